@@ -1,11 +1,14 @@
 from ui.main import Application
 import tkinter as tk
 import os
+import multiprocessing
 from monkey.patch import patch_no_window
 
 patch_no_window()
 
 if __name__ == '__main__':
+    # 打包后 OCR 工作进程需要
+    multiprocessing.freeze_support()
     root = tk.Tk()
     theme_file_abs_path = os.path.join(os.path.dirname(__file__), "ui/azure.tcl")
     root.tk.call("source", theme_file_abs_path)
@@ -0,0 +1,65 @@
+"""ADB 接收路径的分配与吞吐基准
+
+在本地启动 adb server 替身，比较:
+- 原实现: 4KB 分块 recv，data += chunk 拼接
+- 新实现: recv_into 写入缓冲区池借出的缓冲区，用完归还
+
+用法: python -m benchmark.adb_buffers [帧数]
+"""
+import sys
+import time
+import tracemalloc
+import typing as t
+from emulator.adb import ADBClient
+from emulator.fake import FakeADBServer
+
+
+def capture_concat(client: ADBClient) -> bytes:
+    conn = client._open_shell("screencap")
+    data = b''
+    while True:
+        chunk = conn.recv(4096)
+        if not chunk:
+            break
+        data += chunk
+    conn.close()
+    return data
+
+
+def capture_pooled(client: ADBClient) -> None:
+    with client.screenshot_raw():
+        pass
+
+
+def measure(capture: t.Callable[[ADBClient], t.Any], client: ADBClient, num: int) -> t.Tuple[float, int]:
+    tracemalloc.start()
+    start = time.perf_counter()
+    for _ in range(num):
+        capture(client)
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return num / elapsed, peak
+
+
+if __name__ == "__main__":
+    num = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    server = FakeADBServer(address=("127.0.0.1", 0)).start()
+    client = ADBClient(
+        device_host="fake",
+        device_port=0,
+        server_address=server.server_address,
+        launch_server=False
+    )
+
+    # 原实现为平方级拷贝，只跑少量帧
+    concat_num = min(num, 10)
+    fps, peak = measure(capture_concat, client, concat_num)
+    print(f"拼接接收: {fps:.2f} 帧/秒, 峰值内存 {peak / 2**20:.1f} MB ({concat_num} 帧)")
+
+    fps, peak = measure(capture_pooled, client, num)
+    print(f"缓冲区池: {fps:.2f} 帧/秒, 峰值内存 {peak / 2**20:.1f} MB ({num} 帧)")
+    print(f"缓冲区新分配 {client.buffer_pool.allocated} 次, 复用 {client.buffer_pool.reused} 次")
+
+    client.pool.close()
+    server.stop()
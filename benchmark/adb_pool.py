@@ -0,0 +1,46 @@
+"""ADB 连接池微基准
+
+比较每条命令新建连接(pool_size=0)与使用连接池时的每秒命令数
+
+用法: python -m benchmark.adb_pool [命令数] [连接池大小] [fake]
+指定 fake 时使用本地 adb server 替身，不需要模拟器
+"""
+import sys
+import time
+from emulator.adb import ADBClient, ADBConnectionPool
+from emulator.fake import FakeADBServer
+
+
+def commands_per_second(client: ADBClient, num: int) -> float:
+    start = time.perf_counter()
+    for _ in range(num):
+        client._send_shell("echo")
+    return num / (time.perf_counter() - start)
+
+
+def run(client: ADBClient, num: int, pool_size: int) -> None:
+    # 常驻会话不经过连接池，测量时关闭
+    client.shell_session = False
+    client.pool.close()
+    client.pool = ADBConnectionPool(client._device, 0, client.server_address)
+    before = commands_per_second(client, num)
+
+    client.pool = ADBConnectionPool(client._device, pool_size, client.server_address)
+    # 等待连接池预热
+    time.sleep(0.5)
+    after = commands_per_second(client, num)
+    client.pool.close()
+
+    print(f"无连接池: {before:.1f} 条/秒")
+    print(f"连接池({pool_size}): {after:.1f} 条/秒")
+    print(f"提升: {after / before:.2f}x")
+
+
+if __name__ == "__main__":
+    num = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    pool_size = int(sys.argv[2]) if len(sys.argv) > 2 else 4
+    if "fake" in sys.argv[3:]:
+        with FakeADBServer(address=("127.0.0.1", 0)) as server:
+            run(ADBClient(server_address=server.server_address, launch_server=False), num, pool_size)
+    else:
+        run(ADBClient(), num, pool_size)
@@ -0,0 +1,62 @@
+"""Executor 压力测试
+
+使用本地 adb server 替身模拟多台设备，每台设备一个线程循环执行点击链和截图，
+统计动作吞吐和从发出命令到替身记录输入的延迟
+
+用法: python -m benchmark.executor_load [设备数] [每台设备的循环次数]
+"""
+import sys
+import threading
+import time
+import typing as t
+from emulator.fake import FakeADBServer, FakeDevice
+from game.executor import Executor
+from game.action import action
+
+
+def drive(executor: Executor, rounds: int, sent: t.List[float]) -> None:
+    for _ in range(rounds):
+        sent.append(time.time())
+        executor.execute(action().tap(100, 100).tap(200, 200).tap(300, 300), 0)
+        executor.screenshot()
+
+
+if __name__ == "__main__":
+    num_devices = int(sys.argv[1]) if len(sys.argv) > 1 else 4
+    rounds = int(sys.argv[2]) if len(sys.argv) > 2 else 50
+    devices = {f"localhost:{16384 + 32 * i}": FakeDevice() for i in range(num_devices)}
+
+    with FakeADBServer(devices, ("127.0.0.1", 0)) as server:
+        executors = []
+        for serial in devices:
+            host, port = serial.split(":")
+            executors.append(Executor(
+                device_host=host,
+                device_port=int(port),
+                server_address=server.server_address,
+                launch_server=False
+            ))
+        sent_times: t.List[t.List[float]] = [[] for _ in executors]
+        threads = [
+            threading.Thread(target=drive, args=(executor, rounds, sent))
+            for executor, sent in zip(executors, sent_times)
+        ]
+        start = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - start
+
+        total_taps = num_devices * rounds * 3
+        print(f"{num_devices} 台设备, 共 {total_taps} 次点击, {num_devices * rounds} 次截图, 耗时 {elapsed:.2f} 秒")
+        print(f"点击吞吐: {total_taps / elapsed:.1f} 次/秒")
+        for (serial, device), sent in zip(devices.items(), sent_times):
+            # 每轮第一个点击从发出到被替身记录的延迟
+            first_inputs = [timestamp for timestamp, _ in device.inputs[::3]]
+            latency = [received - issued for issued, received in zip(sent, first_inputs)]
+            print(f"{serial}: 平均输入延迟 {sum(latency) / len(latency) * 1000:.1f} ms")
+
+        for executor in executors:
+            executor._client.pool.close()
+            executor._client.session.close()
@@ -0,0 +1,90 @@
+"""OCR 后端对比基准
+
+在录制的游戏截图区域上比较各后端的加载时间、识别延迟、峰值内存和准确率
+每个后端在单独的进程中运行，互不影响导入时间和内存
+
+样本目录中放置截取的区域图片，以及 labels.txt，每行为 "文件名<TAB>正确文字"
+
+用法: python -m benchmark.ocr_backends <样本目录> [后端...]
+"""
+import multiprocessing
+import os
+import sys
+import time
+import typing as t
+from PIL import Image
+
+
+def peak_memory_mb() -> t.Optional[float]:
+    try:
+        import resource
+        # Linux 下单位为 KB
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    except ImportError:
+        pass
+    try:
+        import psutil
+        return psutil.Process().memory_info().peak_wset / 2**20
+    except (ImportError, AttributeError):
+        return None
+
+
+def load_samples(directory: str) -> t.List[t.Tuple[Image.Image, str]]:
+    samples = []
+    with open(os.path.join(directory, "labels.txt"), encoding="utf-8") as f:
+        for line in f:
+            if not line.strip():
+                continue
+            name, label = line.rstrip("\r\n").split("\t", 1)
+            samples.append((Image.open(os.path.join(directory, name)).convert("RGB"), label))
+    return samples
+
+
+def measure(backend_name: str, directory: str, rounds: int) -> t.Dict[str, t.Any]:
+    samples = load_samples(directory)
+    start = time.perf_counter()
+    from ocr.base import create_backend
+    backend = create_backend(backend_name)
+    backend.load()
+    backend._loaded = True
+    load_s = time.perf_counter() - start
+
+    crops = [image for image, _ in samples]
+    # 预热
+    backend.recognize_batch(crops)
+
+    start = time.perf_counter()
+    for _ in range(rounds):
+        results = [backend.recognize(crop) for crop in crops]
+    single_ms = (time.perf_counter() - start) / rounds / len(crops) * 1000
+
+    start = time.perf_counter()
+    for _ in range(rounds):
+        backend.recognize_batch(crops)
+    batch_ms = (time.perf_counter() - start) / rounds / len(crops) * 1000
+
+    correct = sum(text == label for (text, _), (_, label) in zip(results, samples))
+    return {
+        "backend": backend_name,
+        "load_s": load_s,
+        "single_ms": single_ms,
+        "batch_ms": batch_ms,
+        "memory_mb": peak_memory_mb(),
+        "accuracy": correct / len(samples),
+        "errors": [(label, text) for (text, _), (_, label) in zip(results, samples) if text != label],
+    }
+
+
+if __name__ == "__main__":
+    directory = sys.argv[1]
+    backends = sys.argv[2:] or ["paddle", "onnx"]
+    context = multiprocessing.get_context("spawn")
+    for backend_name in backends:
+        with context.Pool(1) as pool:
+            result = pool.apply(measure, (backend_name, directory, 5))
+        memory = f"{result['memory_mb']:.0f} MB" if result["memory_mb"] is not None else "未知"
+        print(f"[{result['backend']}] 加载 {result['load_s']:.2f} 秒, "
+              f"逐张 {result['single_ms']:.2f} ms/张, 批量 {result['batch_ms']:.2f} ms/张, "
+              f"峰值内存 {memory}, 准确率 {result['accuracy']:.1%}")
+        for label, text in result["errors"]:
+            print(f"    {label} -> {text}")
@@ -0,0 +1,69 @@
+"""OCR 批量识别基准
+
+比较逐张调用 recognize 与一次 recognize_batch 的每张耗时
+直接使用 ocr.ini 中配置的后端，不经过缓存、变化检测和多进程，测量的是模型本身的批量推理
+
+用法: python -m benchmark.ocr_batch [截图文件] [张数]
+不指定截图时使用生成的数字图片
+"""
+import configparser
+import os
+import sys
+import time
+import typing as t
+from PIL import Image, ImageDraw
+from ocr.base import create_backend
+from ocr.profile import OCRProfile
+from game import position
+
+
+def synthetic_crops(num: int) -> t.List[Image.Image]:
+    crops = []
+    for i in range(num):
+        image = Image.new("RGB", (160, 48), (255, 255, 255))
+        ImageDraw.Draw(image).text((10, 16), f"{(i * 37) % 200}%", fill=(0, 0, 0))
+        crops.append(image)
+    return crops
+
+
+def screenshot_crops(filename: str, num: int) -> t.List[Image.Image]:
+    # 截图中识别区域较小的几个矩形，循环取够张数
+    rects = [
+        position.exchange_price_percent_rect,
+        position.exchange_price_text_rect,
+        position.expulsion_task_1_progress_rect,
+        position.expulsion_task_2_progress_rect,
+        position.expulsion_task_3_progress_rect,
+    ]
+    image = Image.open(filename).convert("RGB")
+    return [image.crop(rects[i % len(rects)]) for i in range(num)]
+
+
+if __name__ == "__main__":
+    num = int(sys.argv[2]) if len(sys.argv) > 2 else 6
+    crops = screenshot_crops(sys.argv[1], num) if len(sys.argv) > 1 else synthetic_crops(num)
+
+    config = configparser.ConfigParser()
+    config.read(os.path.join(os.getcwd(), "ocr.ini"))
+    ocr = create_backend(config.get("OCR", "backend", fallback="paddle"), OCRProfile.load())
+    ocr.load()
+    ocr._loaded = True
+    # 预热，排除模型加载时间
+    ocr.recognize_batch(crops)
+
+    rounds = 10
+    start = time.perf_counter()
+    for _ in range(rounds):
+        single = [ocr.recognize(crop) for crop in crops]
+    single_ms = (time.perf_counter() - start) / rounds / num * 1000
+
+    start = time.perf_counter()
+    for _ in range(rounds):
+        batch = ocr.recognize_batch(crops)
+    batch_ms = (time.perf_counter() - start) / rounds / num * 1000
+
+    print(f"逐张识别: {single_ms:.2f} ms/张")
+    print(f"批量识别: {batch_ms:.2f} ms/张")
+    print(f"提升: {single_ms / batch_ms:.2f}x")
+    mismatched = sum(a[0] != b[0] for a, b in zip(single, batch))
+    print(f"结果不一致 {mismatched} 张")
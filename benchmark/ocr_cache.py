@@ -0,0 +1,53 @@
+"""OCR 缓存的误命中检查
+
+布局相同、文字不同的两页商品列表 (exchange_item_rect 大小) 不能命中对方的检测缓存，
+相同的页面应当命中
+
+用法: python -m benchmark.ocr_cache [页面对数]
+"""
+import random
+import sys
+import typing as t
+from PIL import Image, ImageDraw
+from ocr.base import DetectResult, ImageLike, Rect
+from ocr.cache import OCRCache
+
+
+class CountingBackend:
+    def __init__(self) -> None:
+        self.calls = 0
+
+    def detect(self, image: ImageLike, rect: t.Optional[Rect] = None, scale: float = 1.0) -> DetectResult:
+        self.calls += 1
+        return []
+
+
+def goods_page(rng: random.Random) -> Image.Image:
+    page = Image.new("RGB", (285, 798), (40, 44, 52))
+    draw = ImageDraw.Draw(page)
+    for row in range(8):
+        top = 12 + row * 98
+        draw.rectangle((8, top, 277, top + 86), outline=(90, 96, 110))
+        text = "".join(rng.choice("ABCDEFGHJKLMNPQRSTUVWXYZ0123456789") for _ in range(8))
+        draw.text((20, top + 30), text, fill=(230, 230, 230))
+    return page
+
+
+def run(pairs: int) -> None:
+    rng = random.Random(0)
+    backend = CountingBackend()
+    cache = OCRCache(backend)
+    for _ in range(pairs):
+        cache.detect(goods_page(rng), roi="exchange_item_rect")
+        cache.detect(goods_page(rng), roi="exchange_item_rect")
+    assert backend.calls == pairs * 2, f"{pairs * 2 - backend.calls} 页误命中缓存"
+
+    page = goods_page(rng)
+    cache.detect(page, roi="exchange_item_rect")
+    cache.detect(page.copy(), roi="exchange_item_rect")
+    assert backend.calls == pairs * 2 + 1, "相同的页面没有命中缓存"
+    print(f"{pairs} 对不同页面全部未命中，相同页面命中")
+
+
+if __name__ == "__main__":
+    run(int(sys.argv[1]) if len(sys.argv) > 1 else 40)
@@ -16,6 +16,9 @@ if not exist .venv (
 --collect-all imgaug ^
 --collect-all scipy ^
 --collect-all lmdb ^
+--collect-all onnxruntime ^
+--hidden-import ocr.ocr_paddle ^
+--hidden-import ocr.ocr_onnx ^
 --add-data .\ui\azure.tcl;.\ui ^
 --add-data .\ui\theme;.\ui\theme ^
 --add-data .\emulator\platform-tools;.\emulator\platform-tools ^
@@ -23,6 +26,7 @@ if not exist .venv (
 --add-data .\icon;.\icon ^
 --add-data .\ocr\model;.\ocr\model ^
 --add-data .\adb.ini;. ^
+--add-data .\ocr.ini;. ^
 --icon .\icon\resonance.ico  ^
 --name ResonanceHelper ^
 --noconsole ^
@@ -6,28 +6,283 @@ import tkinter as tk
 import threading
 import configparser
 import subprocess
+import queue
+import select
+import re
+import struct
+import time
+from .frame import Frame
+from .buffer import BufferPool, receive_into, receive_exact
 
-class ADBClient:
-    def __init__(self):
+ServerAddress = t.Tuple[str, int]
+
+# screencap 原始输出的像素格式
+RAW_PIXEL_FORMATS = {
+    1: "RGBA",  # RGBA_8888
+    2: "RGBX",  # RGBX_8888
+}
+
+
+class ADBConnectionPool:
+    """维护一组已经完成 host:transport 握手的连接
+
+    adb server 在一次服务结束后会关闭连接，因此连接无法复用，
+    连接池在后台提前建立好连接并切换到设备，使命令发送时省去建连和握手的开销
+    """
+    def __init__(self, 
+                 device: str, 
+                 size: int = 2, 
+                 server_address: ServerAddress = ("127.0.0.1", 5037)) -> None:
+        self.device = device
+        self.size = size
+        self.server_address = server_address
+        self._idle: "queue.Queue[socket.socket]" = queue.Queue()
+        self._need_refill = threading.Event()
+        self._closed = False
+        if self.size > 0:
+            threading.Thread(target=self._refill_loop, daemon=True).start()
+            self._need_refill.set()
+
+    def acquire(self) -> socket.socket:
+        # 优先使用池中的连接，取出前做健康检查
+        while True:
+            try:
+                conn = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            if self._is_alive(conn):
+                self._need_refill.set()
+                return conn
+            conn.close()
+        # 池为空时直接新建连接
+        self._need_refill.set()
+        return self.open()
+
+    def open(self) -> socket.socket:
+        conn = socket.create_connection(self.server_address)
+        set_device_command = f"host:transport:{self.device}"
+        conn.send(f"{len(set_device_command):04x}{set_device_command}".encode())
+        status = receive_exact(conn, 4).decode()
+        if status != "OKAY":
+            # 设置设备失败, 关闭连接
+            err_msg = ""
+            if status == "FAIL":
+                lengh = int(receive_exact(conn, 4), 16)
+                err_msg = receive_exact(conn, lengh).decode()
+            conn.close()
+            raise Exception(f"Failed to set device {self.device}, error message: {err_msg}")
+        return conn
+
+    def close(self) -> None:
+        self._closed = True
+        self._need_refill.set()
+        while True:
+            try:
+                self._idle.get_nowait().close()
+            except queue.Empty:
+                break
+
+    def _refill_loop(self) -> None:
+        while True:
+            self._need_refill.wait()
+            self._need_refill.clear()
+            if self._closed:
+                break
+            while self._idle.qsize() < self.size and not self._closed:
+                try:
+                    conn = self.open()
+                except Exception:
+                    # adb server 未启动或设备断开，稍后重试
+                    time.sleep(1)
+                    continue
+                self._idle.put(conn)
+
+    @staticmethod
+    def _is_alive(conn: socket.socket) -> bool:
+        # 空闲连接不应有任何可读数据，可读说明对端已关闭或状态异常
+        try:
+            readable, _, _ = select.select([conn], [], [], 0)
+        except (OSError, ValueError):
+            return False
+        return not readable
+
+
+class CommandLatency:
+    def __init__(self) -> None:
+        self.count = 0
+        self.total = 0.0
+        self.min = float("inf")
+        self.max = 0.0
+
+    def record(self, elapsed: float) -> None:
+        self.count += 1
+        self.total += elapsed
+        self.min = min(self.min, elapsed)
+        self.max = max(self.max, elapsed)
+
+    @property
+    def mean(self) -> float:
+        return self.total / self.count if self.count else 0.0
+
+    def __str__(self) -> str:
+        return f"count={self.count} mean={self.mean * 1000:.1f}ms min={self.min * 1000:.1f}ms max={self.max * 1000:.1f}ms"
+
+
+def command_name(command: str) -> str:
+    # 统计耗时时的命令类型: 合并的脚本、sendevent 手势、input 的子命令，其他命令取命令名
+    if "; echo RH_DONE_" in command:
+        return "script"
+    if command.startswith("ev()"):
+        return "sendevent"
+    words = command.split(" ", 2)
+    if words[0] == "input" and len(words) > 1:
+        return f"input {words[1]}"
+    return words[0]
+
+
+class ShellSession:
+    """常驻的 shell 会话
+
+    命令写入 shell 的 stdin，每条命令后输出一行哨兵标记用于切分输出，
+    避免每条命令都新开一个 adb 服务，多个线程共用时按顺序执行
+    """
+    def __init__(self, open_connection: t.Callable[[], socket.socket]) -> None:
+        self._open_connection = open_connection
+        self._conn: t.Optional[socket.socket] = None
+        self._buffer = b""
+        self._lock = threading.Lock()
+        self._counter = 0
+        # 按命令类型统计的耗时
+        self.latency: t.Dict[str, CommandLatency] = {}
+
+    def run(self, command: str) -> bytes:
+        with self._lock:
+            start = time.perf_counter()
+            try:
+                output = self._run(command)
+            except (ConnectionError, OSError):
+                # 命令发出后断开时可能已经执行，不能重发，下一条命令重新建立会话
+                self._reset()
+                raise
+            self.latency.setdefault(command_name(command), CommandLatency()).record(time.perf_counter() - start)
+            return output
+
+    def close(self) -> None:
+        with self._lock:
+            self._reset()
+
+    def _run(self, command: str) -> bytes:
+        if self._conn is not None and not ADBConnectionPool._is_alive(self._conn):
+            # 空闲期间会话已断开，命令发出前重新建立
+            self._reset()
+        if self._conn is None:
+            self._conn = self._open_connection()
+        self._counter += 1
+        marker = f"\n__RH_{self._counter}__ ".encode()
+        # 哨兵前额外输出一个换行，保证标记独占一行，解析时再去掉
+        self._conn.sendall(f"{command}\nprintf '\\n%s %d\\n' __RH_{self._counter}__ $?\n".encode())
+        while True:
+            index = self._buffer.find(marker)
+            if index >= 0:
+                end = self._buffer.find(b"\n", index + len(marker))
+                if end >= 0:
+                    output = self._buffer[:index]
+                    self._buffer = self._buffer[end + 1:]
+                    return output
+            chunk = self._conn.recv(4096)
+            if not chunk:
+                raise ConnectionError("Shell session closed")
+            self._buffer += chunk
+
+    def _reset(self) -> None:
+        if self._conn is not None:
+            self._conn.close()
+        self._conn = None
+        self._buffer = b""
+
+
+# input_event 类型与编码
+EV_SYN = 0
+EV_KEY = 1
+EV_ABS = 3
+SYN_REPORT = 0
+BTN_TOUCH = 330
+ABS_MT_SLOT = 47
+ABS_MT_POSITION_X = 53
+ABS_MT_POSITION_Y = 54
+ABS_MT_TRACKING_ID = 57
+ABS_MT_PRESSURE = 58
+
+# 设备端每启动一个 sendevent 或 sleep 进程的大致耗时 (秒)，手势中每一步的等待要扣除这部分
+SPAWN_S = 0.004
+
+
+class TouchDevice:
+    def __init__(self, path: str, abs_max: t.Dict[int, int]) -> None:
+        self.path = path
+        self.max_x = abs_max[ABS_MT_POSITION_X]
+        self.max_y = abs_max[ABS_MT_POSITION_Y]
+        self.has_pressure = ABS_MT_PRESSURE in abs_max
+
+    @classmethod
+    def from_getevent(cls, output: str) -> 'TouchDevice':
+        # 解析 getevent -p 的输出，找到支持多点触控坐标的设备节点
+        devices: t.List[t.Tuple[str, t.Dict[int, int]]] = []
+        in_abs = False
+        for line in output.splitlines():
+            match = re.match(r"add device \d+: (\S+)", line)
+            if match:
+                devices.append((match.group(1), {}))
+                in_abs = False
+                continue
+            if re.search(r"[A-Z]+ \(\d{4}\):", line):
+                in_abs = "ABS (0003):" in line
+            if not in_abs or not devices:
+                continue
+            match = re.search(r"([0-9a-f]{4})\s*:\s*value -?\d+, min -?\d+, max (\d+)", line)
+            if match:
+                devices[-1][1][int(match.group(1), 16)] = int(match.group(2))
+
+        for path, abs_max in devices:
+            if ABS_MT_POSITION_X in abs_max and ABS_MT_POSITION_Y in abs_max:
+                return cls(path, abs_max)
+        raise Exception("Touch screen device not found")
+
+
+class BaseADBClient:
+    """同步与异步客户端共用的配置解析和命令构造"""
+    def __init__(self, 
+                 device_host: t.Optional[str] = None, 
+                 device_port: t.Optional[int] = None,
+                 server_address: ServerAddress = ("127.0.0.1", 5037),
+                 launch_server: bool = True):
         self.adb_executable_file = os.path.join(os.path.dirname(__file__), "platform-tools/adb.exe")
         # 解析配置文件
         config = configparser.ConfigParser()
         config_file_abs_path = os.path.join(os.getcwd(), "adb.ini")
         config.read(config_file_abs_path)
 
-        self.device_host = config.get("ADB", "device_host")
-        self.device_port = config.getint("ADB", "device_port")
+        self.device_host = device_host or config.get("ADB", "device_host")
+        self.device_port = device_port or config.getint("ADB", "device_port")
+        self.server_address = server_address
+        self.pool_size = config.getint("ADB", "pool_size", fallback=2)
+        self.screenshot_mode = config.get("ADB", "screenshot_mode", fallback="png")
+        self.batch_execute = config.getboolean("ADB", "batch_execute", fallback=False)
+        self.shell_session = config.getboolean("ADB", "shell_session", fallback=False)
+        self.stream_fps = config.getfloat("ADB", "stream_fps", fallback=5.0)
+        self.touch_backend = config.get("ADB", "touch_backend", fallback="input")
+        self.adaptive_wait = config.getboolean("ADB", "adaptive_wait", fallback=False)
+        self._touch_device: t.Optional[TouchDevice] = None
+        self._tracking_id = 0
 
         self._device = f"{self.device_host}:{self.device_port}"
-        self._socket = None
         self.current_positon_x = 0
         self.current_positon_y = 0
         self.width: t.Optional[int] = None
         self.height: t.Optional[int] = None
-        
-        self.start_server()
-
 
+        if launch_server:
+            self.start_server()
 
     def start_server(self) -> None:
         sub_proc = subprocess.Popen([
@@ -37,6 +292,119 @@ class ADBClient:
         ])
         sub_proc.wait()
 
+    def kill_server(self) -> None:
+        sub_proc = subprocess.Popen([self.adb_executable_file, "kill-server"])
+        sub_proc.wait()
+
+    def tap_command(self, x: int, y: int) -> str:
+        # 用拖拽的方式实现点击以控制点击时长
+        duration = random.randint(100, 120)
+        if self.touch_backend == "sendevent":
+            return self._sendevent_gesture([(x, y)], duration)
+        return f"input swipe {x} {y} {x+1} {y+1} {duration}"
+
+    def swipe_command(self, x1: int, y1: int, x2: int, y2: int) -> str:
+        duration = random.randint(1500, 2000)
+        if self.touch_backend == "sendevent":
+            # 按约 200ms 一步插值出中间点，每一步都要在设备端启动 4 个进程，步数过多会明显拖长手势
+            steps = max(duration // 200, 1)
+            points = [
+                (x1 + (x2 - x1) * i // steps, y1 + (y2 - y1) * i // steps)
+                for i in range(steps + 1)
+            ]
+            return self._sendevent_gesture(points, duration)
+        return f"input swipe {x1} {y1} {x2} {y2} {duration}"
+
+    @property
+    def touch_device(self) -> TouchDevice:
+        if self._touch_device is None:
+            raise Exception("Touch screen device has not been discovered")
+        return self._touch_device
+
+    def _screen_to_touch(self, x: int, y: int) -> t.Tuple[int, int]:
+        # 与 _process_event 相反的变换
+        device = self.touch_device
+        # 由于是横屏，所以x y坐标需要调换，且y坐标需要取反
+        touch_x = (self.height - y) * (device.max_x + 1) // self.height
+        touch_y = x * (device.max_y + 1) // self.width
+        return min(touch_x, device.max_x), min(touch_y, device.max_y)
+
+    def _sendevent_gesture(self, points: t.List[t.Tuple[int, int]], duration_ms: int) -> str:
+        # 直接向触摸屏设备节点写入多点触控事件，省去 input 工具的启动开销
+        # 按下后依次经过各个点，总时长为 duration_ms
+        device = self.touch_device
+        self._tracking_id = (self._tracking_id + 1) % 65535
+        events: t.List[str] = []
+
+        def report(*pairs: t.Tuple[int, int, int]) -> None:
+            events.extend(f"ev {type_} {code} {value}" for type_, code, value in pairs)
+            events.append(f"ev {EV_SYN} {SYN_REPORT} 0")
+
+        touch_x, touch_y = self._screen_to_touch(*points[0])
+        down = [
+            (EV_ABS, ABS_MT_SLOT, 0),
+            (EV_ABS, ABS_MT_TRACKING_ID, self._tracking_id),
+            (EV_KEY, BTN_TOUCH, 1),
+            (EV_ABS, ABS_MT_POSITION_X, touch_x),
+            (EV_ABS, ABS_MT_POSITION_Y, touch_y),
+        ]
+        if device.has_pressure:
+            down.append((EV_ABS, ABS_MT_PRESSURE, 50))
+        report(*down)
+
+        # 每一步启动 sleep 和 X、Y、同步三条 sendevent，共 4 个进程
+        step_s = max(duration_ms / 1000 / max(len(points) - 1, 1) - 4 * SPAWN_S, 0.0)
+        for point in points[1:]:
+            events.append(f"sleep {step_s:.3f}")
+            touch_x, touch_y = self._screen_to_touch(*point)
+            report((EV_ABS, ABS_MT_POSITION_X, touch_x), (EV_ABS, ABS_MT_POSITION_Y, touch_y))
+        if len(points) == 1:
+            events.append(f"sleep {step_s:.3f}")
+
+        report((EV_ABS, ABS_MT_TRACKING_ID, -1), (EV_KEY, BTN_TOUCH, 0))
+        # 用短函数名缩短命令长度
+        return f"ev() {{ sendevent {device.path} $@; }}; " + "; ".join(events)
+
+    def _build_script(self, commands: t.List[str], interval_ms: int) -> t.Tuple[str, str]:
+        # 将多条命令合并为一个设备端脚本，命令间的等待也在设备端完成
+        # 脚本最后输出一个随机标记作为完成确认
+        token = f"RH_DONE_{random.getrandbits(32):08x}"
+        separator = f"; sleep {interval_ms / 1000:g}; " if interval_ms > 0 else "; "
+        return separator.join(commands) + f"; echo {token}", token
+
+    def _process_event(self, event_str: str) -> None:
+        events = [event.strip() for event in event_str.split("\n")]
+        for event in events:
+            if "ABS_MT_POSITION_X" in event:
+                # 由于是横屏，所以x y坐标需要调换
+                y = int(event.split(" ")[-1], 16)
+                # 且y坐标需要取反
+                y = self.height - y
+
+                self.current_positon_y = y
+            if "ABS_MT_POSITION_Y" in event:
+                # 由于是横屏，所以x y坐标需要调换
+                x = int(event.split(" ")[-1], 16)
+                self.current_positon_x = x
+
+    def _parse_screen_size(self, msg: bytes) -> t.Tuple[int, int]:
+        screen_size = msg.decode().split(" ")[-1].strip()
+        # 由于是横屏，所以宽高需要调换
+        height, width = screen_size.split("x")
+        return int(width), int(height)
+
+
+class ADBClient(BaseADBClient):
+    def __init__(self, 
+                 device_host: t.Optional[str] = None, 
+                 device_port: t.Optional[int] = None,
+                 server_address: ServerAddress = ("127.0.0.1", 5037),
+                 launch_server: bool = True):
+        super().__init__(device_host, device_port, server_address, launch_server)
+        self._socket = None
+        self.buffer_pool = BufferPool()
+        self.pool = ADBConnectionPool(self._device, self.pool_size, self.server_address)
+        self.session = ShellSession(lambda: self._open_shell("sh"))
 
     @property
     def adb_socket(self) -> socket.socket:
@@ -48,81 +416,151 @@ class ADBClient:
         # 创建 Socket 对象
         adb_socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
         # 连接本地 ADB 服务器
-        adb_socket.connect(('127.0.0.1', 5037))
+        adb_socket.connect(self.server_address)
         return adb_socket
-    
-    def _send(self, command: str) -> bytes:
+
+    def _open_service(self, command: str, conn: t.Optional[socket.socket] = None) -> socket.socket:
+        conn = conn or self.adb_socket
         # 发送命令
-        self.adb_socket.send(f"{len(command):04x}{command}".encode())
+        conn.send(f"{len(command):04x}{command}".encode())
         # 接受前 4 个字节的数据
-        status = self.adb_socket.recv(4).decode()
+        try:
+            status = receive_exact(conn, 4).decode()
+        except ConnectionError:
+            # 连接已被对端关闭，命令未被处理
+            conn.close()
+            raise ConnectionError(f"Connection closed before command {command}")
 
         if status != "OKAY":
             # 发送命令失败, 关闭连接
-            err_msg = self._get_err_msg()
-            self._socket.close()
+            err_msg = self._get_err_msg(conn)
+            conn.close()
             raise Exception(f"Failed to send command {command}, error message: {err_msg}")
-        
-        # 尝试获取数据长度
-        res = self.adb_socket.recv(4)
+        return conn
+
+    def _read_shell(self, conn: socket.socket) -> bytes:
+        # shell 服务的输出没有长度前缀，一直读到对端关闭
         try:
-            lengh = int(res, 16)
-        except ValueError:
-            msg =  res + self._receive_all()
-            self.adb_socket.close()
-            return msg
+            return self._receive_all(conn)
+        finally:
+            conn.close()
 
-        msg = self.adb_socket.recv(lengh)
-        self.adb_socket.close()
-        return msg
-    
     def _set_device(self) -> None:
         set_device_command = f"host:transport:{self._device}"
         self.adb_socket.send(f"{len(set_device_command):04x}{set_device_command}".encode())
-        status = self.adb_socket.recv(4).decode()
+        status = self._receive_exact(self.adb_socket, 4).decode()
         if status != "OKAY":
             # 设置设备失败, 关闭连接
             err_msg = self._get_err_msg()
             self._socket.close()
             raise Exception(f"Failed to set device {self._device}, error message: {err_msg}")
 
+    def _open_shell(self, command: str) -> socket.socket:
+        try:
+            return self._open_service(f"shell:{command}", self.pool.acquire())
+        except (ConnectionError, OSError):
+            # 池中连接失效，使用新连接重试一次
+            return self._open_service(f"shell:{command}", self.pool.open())
+
     def _send_shell(self, command: str) -> bytes:
-        self._set_device()
-        msg = self._send(f"shell:{command}")
-        return msg
-    
-    def _receive_all(self, buffer_size=4096) -> bytes:
+        if self.shell_session:
+            return self.session.run(command)
+        return self._read_shell(self._open_shell(command))
+
+    def shell(self, command: str) -> str:
+        return self._send_shell(command).decode(errors="ignore")
+
+    def _receive_all(self, 
+                     conn: t.Optional[socket.socket] = None, 
+                     prefix: bytes = b'', 
+                     buffer_size: int = 1 << 20) -> bytes:
         """Receive data from socket until no more data is available."""
-        data = b''
+        conn = conn or self.adb_socket
+        # 从缓冲区池借出缓冲区直接写入，写满时倍增容量
+        buffer = self.buffer_pool.acquire(max(buffer_size, len(prefix)))
+        buffer[:len(prefix)] = prefix
+        received = len(prefix)
         while True:
-            chunk = self.adb_socket.recv(buffer_size)
-            if not chunk:
+            if received == len(buffer):
+                grown = bytearray(len(buffer) * 2)
+                grown[:received] = buffer
+                self.buffer_pool.release(buffer)
+                buffer = grown
+            n = conn.recv_into(memoryview(buffer)[received:])
+            if n == 0:
                 break
-            data += chunk
+            received += n
+        data = bytes(memoryview(buffer)[:received])
+        self.buffer_pool.release(buffer)
         return data
-    
+
+    def _receive_exact(self, conn: socket.socket, size: int) -> bytearray:
+        return receive_exact(conn, size)
+
     def screenshot(self, filename: t.Optional[str]=None) -> t.Optional[bytes]:
-        msg = self._send_shell("screencap -p")
+        # 截图数据量大且为二进制，不走常驻会话
+        msg = self._read_shell(self._open_shell("screencap -p"))
         if filename:
             with open(filename, "wb") as f:
                 f.write(msg)
         else:
             return msg
-        
-    def stop_server(self) -> None:
+
+    def screenshot_raw(self) -> Frame:
+        # 不加 -p 时 screencap 直接输出未编码的像素，省去设备端 PNG 编码和本地解码
+        conn = self._open_shell("screencap")
+        try:
+            width, height, pixel_format = struct.unpack("<III", self._receive_exact(conn, 12))
+            if pixel_format not in RAW_PIXEL_FORMATS:
+                raise Exception(f"Unsupported screencap pixel format {pixel_format}")
+            size = width * height * 4
+            # Android 9 之后头部多 4 字节的色彩空间字段，预留出这部分空间
+            buffer = self.buffer_pool.acquire(size + 4)
+            received = receive_into(conn, memoryview(buffer)[:size + 4])
+        finally:
+            conn.close()
+
+        offset = received - size
+        if offset not in (0, 4):
+            self.buffer_pool.release(buffer)
+            raise Exception(f"Unexpected screencap payload size {received} for {width}x{height}")
+        return Frame.from_raw(buffer, width, height, offset, RAW_PIXEL_FORMATS[pixel_format], self.buffer_pool)
+
+    def capture(self) -> Frame:
+        if self.screenshot_mode == "raw":
+            return self.screenshot_raw()
+        return Frame.from_png(self.screenshot())
+
+    def close(self) -> None:
+        # 只关闭本客户端的连接，adb server 可能仍被其他设备的客户端使用
         if self._socket is not None:
             self._socket.close()
-        sub_proc = subprocess.Popen([self.adb_executable_file, "kill-server"])
-        sub_proc.wait()
-        
+        self.session.close()
+        self.pool.close()
+
+    def stop_server(self) -> None:
+        self.close()
+        self.kill_server()
+
+    @property
+    def touch_device(self) -> TouchDevice:
+        if self._touch_device is None:
+            if self.width is None or self.height is None:
+                self.width, self.height = self._get_screen_size()
+            self._touch_device = TouchDevice.from_getevent(self.shell("getevent -p"))
+        return self._touch_device
+
     def tap(self, x: int, y: int) -> None:
-        # 用拖拽的方式实现点击以控制点击时长
-        duration = random.randint(100, 120)
-        self._send_shell(f"input swipe {x} {y} {x+1} {y+1} {duration}")
+        self._send_shell(self.tap_command(x, y))
 
     def swipe(self, x1: int, y1: int, x2: int, y2: int) -> None:
-        duration = random.randint(1500, 2000)
-        self._send_shell(f"input swipe {x1} {y1} {x2} {y2} {duration}")
+        self._send_shell(self.swipe_command(x1, y1, x2, y2))
+
+    def run_script(self, commands: t.List[str], interval_ms: int = 0) -> None:
+        script, token = self._build_script(commands, interval_ms)
+        output = self._send_shell(script).decode(errors="ignore")
+        if token not in output:
+            raise Exception(f"Script did not finish, output: {output}")
 
     def listen_event(self) -> None:
         if self.width is None or self.height is None:
@@ -133,7 +571,7 @@ class ADBClient:
         # 发送命令
         self.adb_socket.send(f"{len(command):04x}{command}".encode())
         # 接受前 4 个字节的数据
-        status = self.adb_socket.recv(4).decode()
+        status = self._receive_exact(self.adb_socket, 4).decode()
         print(status)
         # 新开一个线程显示坐标
         threading.Thread(target=self.show_position).start()
@@ -148,35 +586,13 @@ class ADBClient:
                 # 原因是坐标时间恰好在事件名和坐标之间截断了，这种情况直接跳过，不处理
                 continue
 
-    def _process_event(self, event_str: str) -> None:
-        events = [event.strip() for event in event_str.split("\n")]
-        for event in events:
-            if "ABS_MT_POSITION_X" in event:
-                # 由于是横屏，所以x y坐标需要调换
-                y = int(event.split(" ")[-1], 16)
-                # 且y坐标需要取反
-                y = self.height - y
-
-                self.current_positon_y = y
-            if "ABS_MT_POSITION_Y" in event:
-                # 由于是横屏，所以x y坐标需要调换
-                x = int(event.split(" ")[-1], 16)
-                self.current_positon_x = x
-
-            
-    
-
-    def _get_err_msg(self) -> str:
-        lengh = int(self.adb_socket.recv(4), 16)
-        return self.adb_socket.recv(lengh).decode()
-
+    def _get_err_msg(self, conn: t.Optional[socket.socket] = None) -> str:
+        conn = conn or self.adb_socket
+        lengh = int(self._receive_exact(conn, 4), 16)
+        return self._receive_exact(conn, lengh).decode()
 
     def _get_screen_size(self) -> t.Tuple[int, int]:
-        msg = self._send_shell("wm size")
-        screen_size = msg.decode().split(" ")[-1].strip()
-        # 由于是横屏，所以宽高需要调换
-        height, width = screen_size.split("x")
-        return int(width), int(height)
+        return self._parse_screen_size(self._send_shell("wm size"))
 
     def show_position(self) -> None:
         # 设置窗口大小为300*100
@@ -196,6 +612,7 @@ class ADBClient:
         refresh_position()
         root.mainloop()
 
+
     
 if __name__ == "__main__":
     import time
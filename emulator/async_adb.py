@@ -0,0 +1,138 @@
+import asyncio
+import struct
+import typing as t
+from .adb import BaseADBClient, ServerAddress, TouchDevice, RAW_PIXEL_FORMATS
+from .frame import Frame
+
+
+class AsyncADBClient(BaseADBClient):
+    """基于 asyncio 流的 ADB 客户端
+
+    每条命令使用独立的连接，截图和输入命令可以并发执行，
+    多个设备的客户端也可以在同一个事件循环中驱动
+    """
+    def __init__(self,
+                 device_host: t.Optional[str] = None,
+                 device_port: t.Optional[int] = None,
+                 server_address: ServerAddress = ("127.0.0.1", 5037),
+                 launch_server: bool = True):
+        super().__init__(device_host, device_port, server_address, launch_server)
+        self._writers: t.Set[asyncio.StreamWriter] = set()
+
+    async def _request(self,
+                       reader: asyncio.StreamReader,
+                       writer: asyncio.StreamWriter,
+                       command: str) -> None:
+        writer.write(f"{len(command):04x}{command}".encode())
+        await writer.drain()
+        status = await reader.readexactly(4)
+        if status != b"OKAY":
+            lengh = int(await reader.readexactly(4), 16)
+            err_msg = (await reader.readexactly(lengh)).decode()
+            writer.close()
+            raise Exception(f"Failed to send command {command}, error message: {err_msg}")
+
+    async def _open_service(self, command: str) -> t.Tuple[asyncio.StreamReader, asyncio.StreamWriter]:
+        reader, writer = await asyncio.open_connection(*self.server_address)
+        await self._request(reader, writer, f"host:transport:{self._device}")
+        await self._request(reader, writer, command)
+        self._writers.add(writer)
+        return reader, writer
+
+    def _close(self, writer: asyncio.StreamWriter) -> None:
+        self._writers.discard(writer)
+        writer.close()
+
+    async def _send_shell(self, command: str) -> bytes:
+        reader, writer = await self._open_service(f"shell:{command}")
+        try:
+            return await reader.read()
+        finally:
+            self._close(writer)
+
+    async def shell(self, command: str) -> str:
+        return (await self._send_shell(command)).decode(errors="ignore")
+
+    async def screenshot(self) -> bytes:
+        return await self._send_shell("screencap -p")
+
+    async def screenshot_raw(self) -> Frame:
+        reader, writer = await self._open_service("shell:screencap")
+        try:
+            width, height, pixel_format = struct.unpack("<III", await reader.readexactly(12))
+            if pixel_format not in RAW_PIXEL_FORMATS:
+                raise Exception(f"Unsupported screencap pixel format {pixel_format}")
+            payload = await reader.read()
+        finally:
+            self._close(writer)
+
+        size = width * height * 4
+        # Android 9 之后头部多 4 字节的色彩空间字段
+        offset = len(payload) - size
+        if offset not in (0, 4):
+            raise Exception(f"Unexpected screencap payload size {len(payload)} for {width}x{height}")
+        return Frame.from_raw(payload, width, height, offset, RAW_PIXEL_FORMATS[pixel_format])
+
+    async def capture(self) -> Frame:
+        if self.screenshot_mode == "raw":
+            return await self.screenshot_raw()
+        return Frame.from_png(await self.screenshot())
+
+    async def get_screen_size(self) -> t.Tuple[int, int]:
+        if self.width is None or self.height is None:
+            self.width, self.height = self._parse_screen_size(await self._send_shell("wm size"))
+        return self.width, self.height
+
+    async def prepare_touch(self) -> None:
+        # sendevent 方式需要提前获取屏幕尺寸和触摸屏设备节点
+        if self.touch_backend != "sendevent" or self._touch_device is not None:
+            return
+        await self.get_screen_size()
+        self._touch_device = TouchDevice.from_getevent(await self.shell("getevent -p"))
+
+    async def tap(self, x: int, y: int) -> None:
+        await self.prepare_touch()
+        await self._send_shell(self.tap_command(x, y))
+
+    async def swipe(self, x1: int, y1: int, x2: int, y2: int) -> None:
+        await self.prepare_touch()
+        await self._send_shell(self.swipe_command(x1, y1, x2, y2))
+
+    async def run_script(self, commands: t.List[str], interval_ms: int = 0) -> None:
+        script, token = self._build_script(commands, interval_ms)
+        output = (await self._send_shell(script)).decode(errors="ignore")
+        if token not in output:
+            raise Exception(f"Script did not finish, output: {output}")
+
+    async def listen_event(self) -> t.AsyncIterator[t.Tuple[int, int]]:
+        # 每收到一行触摸事件就产出一次当前坐标
+        await self.get_screen_size()
+        reader, writer = await self._open_service("shell:getevent -lt")
+        try:
+            while True:
+                event = await reader.readline()
+                if not event:
+                    break
+                try:
+                    self._process_event(event.decode())
+                except ValueError:
+                    continue
+                yield self.current_positon_x, self.current_positon_y
+        finally:
+            self._close(writer)
+
+    async def close(self) -> None:
+        for writer in list(self._writers):
+            self._close(writer)
+
+
+if __name__ == "__main__":
+    async def main():
+        client = AsyncADBClient()
+        # 截图与点击并发执行
+        frame, _ = await asyncio.gather(client.capture(), client.tap(960, 540))
+        print(frame.size)
+        async for x, y in client.listen_event():
+            print(x, y)
+
+    asyncio.run(main())
@@ -0,0 +1,54 @@
+import typing as t
+import socket
+import threading
+
+
+class BufferPool:
+    """可复用的接收缓冲区
+
+    截图从池中借出缓冲区，用完后归还，避免每帧都重新分配几 MB 的内存
+    """
+    def __init__(self, max_buffers: int = 4) -> None:
+        self.max_buffers = max_buffers
+        self._free: t.List[bytearray] = []
+        self._lock = threading.Lock()
+        # 新分配的缓冲区数量
+        self.allocated = 0
+        # 复用的缓冲区数量
+        self.reused = 0
+
+    def acquire(self, size: int) -> bytearray:
+        with self._lock:
+            # 选择能容纳 size 的最小缓冲区
+            candidates = [buffer for buffer in self._free if len(buffer) >= size]
+            if candidates:
+                buffer = min(candidates, key=len)
+                self._free.remove(buffer)
+                self.reused += 1
+                return buffer
+            self.allocated += 1
+        return bytearray(size)
+
+    def release(self, buffer: bytearray) -> None:
+        with self._lock:
+            if len(self._free) < self.max_buffers and all(buffer is not free for free in self._free):
+                self._free.append(buffer)
+
+
+def receive_into(conn: socket.socket, view: memoryview) -> int:
+    # 持续读取直到填满 view 或连接关闭，返回实际读取的字节数
+    received = 0
+    while received < len(view):
+        n = conn.recv_into(view[received:])
+        if n == 0:
+            break
+        received += n
+    return received
+
+
+def receive_exact(conn: socket.socket, size: int) -> bytearray:
+    buffer = bytearray(size)
+    received = receive_into(conn, memoryview(buffer))
+    if received < size:
+        raise ConnectionError(f"Connection closed after {received} of {size} bytes")
+    return buffer
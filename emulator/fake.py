@@ -0,0 +1,273 @@
+"""纯 Python 实现的 adb server 与设备替身
+
+用于在没有模拟器的机器上测试和压测 ADBClient / Executor:
+- 支持 host:transport、shell:、exec: 服务，以及常驻的 shell:sh 会话
+- 截图来自目录中的图片或给定的图片序列，依次循环返回
+- 所有输入命令都带时间戳记录在 FakeDevice.inputs 中
+
+用法: python -m emulator.fake [截图目录] [端口]
+"""
+import os
+import re
+import shlex
+import socket
+import socketserver
+import struct
+import threading
+import time
+import typing as t
+from io import BytesIO
+from PIL import Image
+
+ImageSource = t.Union[str, Image.Image]
+
+
+class FakeDevice:
+    def __init__(self,
+                 screenshots: t.Union[str, t.Sequence[ImageSource], None] = None,
+                 size: t.Tuple[int, int] = (1920, 1080),
+                 input_latency_ms: int = 0) -> None:
+        self.size = size
+        # 模拟 input 命令本身的耗时
+        self.input_latency_ms = input_latency_ms
+        self.inputs: t.List[t.Tuple[float, str]] = []
+        self.properties: t.Dict[str, str] = {
+            "ro.product.model": "FakeDevice",
+            "ro.build.version.sdk": "32",
+            "ro.product.cpu.abi": "x86_64",
+        }
+        self._images = self._load(screenshots)
+        self._index = 0
+        self._lock = threading.Lock()
+        self._functions: t.Dict[str, str] = {}
+        # 每张图片的 PNG 和原始格式只编码一次
+        self._png_cache: t.Dict[int, bytes] = {}
+        self._raw_cache: t.Dict[int, bytes] = {}
+
+    def _load(self, screenshots: t.Union[str, t.Sequence[ImageSource], None]) -> t.List[Image.Image]:
+        if screenshots is None:
+            return [Image.new("RGBA", self.size, (128, 128, 128, 255))]
+        if isinstance(screenshots, str):
+            screenshots = [
+                os.path.join(screenshots, name) for name in sorted(os.listdir(screenshots))
+                if name.lower().endswith((".png", ".jpg", ".jpeg", ".bmp"))
+            ]
+        images = []
+        for source in screenshots:
+            image = Image.open(source) if isinstance(source, str) else source
+            images.append(image.convert("RGBA").resize(self.size))
+        if not images:
+            raise ValueError("No screenshots found")
+        return images
+
+    def _next_index(self) -> int:
+        with self._lock:
+            index = self._index
+            self._index = (self._index + 1) % len(self._images)
+            return index
+
+    def screencap_png(self) -> bytes:
+        index = self._next_index()
+        if index not in self._png_cache:
+            buffer = BytesIO()
+            self._images[index].save(buffer, format="PNG")
+            self._png_cache[index] = buffer.getvalue()
+        return self._png_cache[index]
+
+    def screencap_raw(self) -> bytes:
+        index = self._next_index()
+        if index not in self._raw_cache:
+            width, height = self.size
+            header = struct.pack("<IIII", width, height, 1, 0)
+            self._raw_cache[index] = header + self._images[index].tobytes()
+        return self._raw_cache[index]
+
+    def getevent_description(self) -> str:
+        width, height = self.size
+        # 竖屏坐标系，与真机一致
+        return (
+            "add device 1: /dev/input/event1\n"
+            '  name:     "fake_touchscreen"\n'
+            "  events:\n"
+            "    KEY (0001): 014a\n"
+            f"    ABS (0003): 0035  : value 0, min 0, max {height - 1}, fuzz 0, flat 0, resolution 0\n"
+            f"                0036  : value 0, min 0, max {width - 1}, fuzz 0, flat 0, resolution 0\n"
+            "                0039  : value 0, min 0, max 65535, fuzz 0, flat 0, resolution 0\n"
+            "  input props:\n"
+            "    INPUT_PROP_DIRECT\n"
+        )
+
+    def run(self, script: str) -> bytes:
+        # 极简的 shell，只支持助手会用到的命令
+        script = self._define_functions(script)
+        output = b""
+        for statement in re.split(r"[;\n]", script):
+            statement = statement.strip()
+            if statement:
+                output += self._run_statement(statement)
+        return output
+
+    def _define_functions(self, script: str) -> str:
+        # 形如 ev() { sendevent /dev/input/event1 $@; } 的函数定义
+        def define(match: re.Match) -> str:
+            self._functions[match.group(1)] = match.group(2).replace("$@", "").strip()
+            return ""
+        return re.sub(r"(\w+)\(\)\s*\{\s*(.*?);\s*\}", define, script)
+
+    def _run_statement(self, statement: str) -> bytes:
+        args = shlex.split(statement.replace("$?", "0"))
+        if args[0] in self._functions:
+            args = shlex.split(self._functions[args[0]]) + args[1:]
+        name = args[0]
+
+        if name == "screencap":
+            return self.screencap_png() if "-p" in args else self.screencap_raw()
+        if name == "input" or name == "sendevent":
+            self.inputs.append((time.time(), " ".join(args)))
+            if name == "input" and self.input_latency_ms > 0:
+                time.sleep(self.input_latency_ms / 1000)
+            return b""
+        if name == "sleep":
+            time.sleep(float(args[1]))
+            return b""
+        if name == "wm" and args[1:] == ["size"]:
+            width, height = self.size
+            return f"Physical size: {height}x{width}\n".encode()
+        if name == "getevent" and "-p" in args:
+            return self.getevent_description().encode()
+        if name == "getprop":
+            if len(args) > 1:
+                return f"{self.properties.get(args[1], '')}\n".encode()
+            return "".join(f"[{key}]: [{value}]\n" for key, value in self.properties.items()).encode()
+        if name == "echo":
+            return (" ".join(args[1:]) + "\n").encode()
+        if name == "printf":
+            fmt = args[1].encode().decode("unicode_escape")
+            values = iter(args[2:])
+            return re.sub(r"%[sd]", lambda _: next(values, ""), fmt).encode()
+        return b""
+
+
+class FakeADBHandler(socketserver.BaseRequestHandler):
+    server: 'FakeADBServer'
+
+    def _read_request(self) -> t.Optional[str]:
+        length = self._receive(4)
+        if length is None:
+            return None
+        return (self._receive(int(length, 16)) or b"").decode()
+
+    def _receive(self, size: int) -> t.Optional[bytes]:
+        data = b""
+        while len(data) < size:
+            chunk = self.request.recv(size - len(data))
+            if not chunk:
+                return None
+            data += chunk
+        return data
+
+    def _okay(self, payload: t.Optional[str] = None) -> None:
+        self.request.sendall(b"OKAY")
+        if payload is not None:
+            self.request.sendall(f"{len(payload):04x}{payload}".encode())
+
+    def _fail(self, message: str) -> None:
+        self.request.sendall(f"FAIL{len(message):04x}{message}".encode())
+
+    def handle(self) -> None:
+        conn: socket.socket = self.request
+        device: t.Optional[FakeDevice] = None
+        while True:
+            request = self._read_request()
+            if request is None:
+                return
+            if request == "host:version":
+                self._okay("0029")
+            elif request == "host:devices":
+                self._okay("".join(f"{serial}\tdevice\n" for serial in self.server.devices))
+            elif request.startswith("host:transport:"):
+                device = self.server.get_device(request[len("host:transport:"):])
+                if device is None:
+                    self._fail("device not found")
+                    return
+                self._okay()
+            elif device is None:
+                self._fail(f"unknown host service {request}")
+                return
+            elif request == "shell:sh":
+                self._okay()
+                self._interactive(device)
+                return
+            elif request.startswith("shell:getevent -lt"):
+                # 不产生触摸事件，保持连接直到对端关闭
+                self._okay()
+                while conn.recv(4096):
+                    pass
+                return
+            elif request.startswith(("shell:", "exec:")):
+                self._okay()
+                conn.sendall(device.run(request.split(":", 1)[1]))
+                return
+            else:
+                self._fail(f"unknown service {request}")
+                return
+
+    def _interactive(self, device: FakeDevice) -> None:
+        # 常驻会话，按行执行 stdin 中的命令
+        buffer = b""
+        while True:
+            chunk = self.request.recv(4096)
+            if not chunk:
+                return
+            buffer += chunk
+            while b"\n" in buffer:
+                line, buffer = buffer.split(b"\n", 1)
+                self.request.sendall(device.run(line.decode()))
+
+
+class FakeADBServer(socketserver.ThreadingTCPServer):
+    allow_reuse_address = True
+    daemon_threads = True
+
+    def __init__(self,
+                 devices: t.Optional[t.Dict[str, FakeDevice]] = None,
+                 address: t.Tuple[str, int] = ("127.0.0.1", 5037)) -> None:
+        # 未指定设备时，任何序列号都会得到一个默认设备
+        self.devices: t.Dict[str, FakeDevice] = devices if devices is not None else {}
+        self.accept_any = devices is None
+        self._lock = threading.Lock()
+        super().__init__(address, FakeADBHandler)
+
+    def get_device(self, serial: str) -> t.Optional[FakeDevice]:
+        with self._lock:
+            if serial not in self.devices and self.accept_any:
+                self.devices[serial] = FakeDevice()
+            return self.devices.get(serial)
+
+    def start(self) -> 'FakeADBServer':
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+        return self
+
+    def stop(self) -> None:
+        self.shutdown()
+        self.server_close()
+
+    def __enter__(self) -> 'FakeADBServer':
+        return self.start()
+
+    def __exit__(self, *args) -> None:
+        self.stop()
+
+
+if __name__ == "__main__":
+    import sys
+    screenshots = sys.argv[1] if len(sys.argv) > 1 else None
+    port = int(sys.argv[2]) if len(sys.argv) > 2 else 5037
+    device = FakeDevice(screenshots)
+    server = FakeADBServer({"localhost:16384": device}, ("127.0.0.1", port))
+    print(f"Fake adb server listening on 127.0.0.1:{port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        for timestamp, command in device.inputs:
+            print(f"{timestamp:.3f} {command}")
@@ -0,0 +1,89 @@
+import typing as t
+from io import BytesIO
+import numpy as np
+from PIL import Image
+from .buffer import BufferPool
+
+
+class Frame:
+    """一帧截图，底层为 H x W x 4 的 uint8 数组
+
+    PIL 和 OCR 都可以直接使用，原始截图模式下数组是接收缓冲区的视图，不会发生拷贝
+    """
+    def __init__(self,
+                 array: np.ndarray,
+                 mode: str = "RGBA",
+                 buffer: t.Optional[bytearray] = None,
+                 pool: t.Optional[BufferPool] = None) -> None:
+        self.array = array
+        self.mode = mode
+        self._image: t.Optional[Image.Image] = None
+        # 数组所引用的缓冲区，release 时归还给缓冲区池
+        self._buffer = buffer
+        self._pool = pool
+        self.released = False
+
+    @classmethod
+    def from_raw(cls,
+                 buffer: bytearray,
+                 width: int,
+                 height: int,
+                 offset: int = 0,
+                 mode: str = "RGBA",
+                 pool: t.Optional[BufferPool] = None) -> 'Frame':
+        array = np.frombuffer(buffer, dtype=np.uint8, count=width * height * 4, offset=offset)
+        return cls(array.reshape(height, width, 4), mode, buffer, pool)
+
+    @classmethod
+    def from_png(cls, data: bytes) -> 'Frame':
+        image = Image.open(BytesIO(data)).convert("RGBA")
+        return cls(np.asarray(image))
+
+    @property
+    def width(self) -> int:
+        return self.array.shape[1]
+
+    @property
+    def height(self) -> int:
+        return self.array.shape[0]
+
+    @property
+    def size(self) -> t.Tuple[int, int]:
+        return self.width, self.height
+
+    @property
+    def image(self) -> Image.Image:
+        if self._image is None:
+            # frombuffer 与数组共享内存
+            self._image = Image.frombuffer(self.mode, self.size, self.array, "raw", self.mode, 0, 1)
+        return self._image
+
+    def crop(self, rect: t.Tuple[int, int, int, int]) -> Image.Image:
+        return self.image.crop(rect)
+
+    def save(self, filename: str) -> None:
+        self.image.save(filename)
+
+    def to_png(self) -> bytes:
+        buffer = BytesIO()
+        self.image.save(buffer, format="PNG")
+        return buffer.getvalue()
+
+    def release(self) -> None:
+        # 归还缓冲区后该帧及其数组、图像都不能再使用
+        if self._pool is not None and self._buffer is not None:
+            self._image = None
+            self._pool.release(self._buffer)
+        self._buffer = None
+        self.released = True
+
+    def __enter__(self) -> 'Frame':
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.release()
+
+    def __array__(self, dtype=None, copy=None) -> np.ndarray:
+        if dtype is not None:
+            return self.array.astype(dtype)
+        return self.array
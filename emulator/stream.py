@@ -0,0 +1,88 @@
+import typing as t
+import threading
+import time
+from .frame import Frame
+
+
+class FrameStream:
+    """后台线程连续截图，只保留最新的一帧
+
+    最新帧以 (序号, 开始截图时间, 帧) 元组整体替换，读取方无需加锁
+    """
+    def __init__(self, capture: t.Callable[[], Frame], max_fps: float = 5.0) -> None:
+        self._capture = capture
+        self.max_fps = max_fps
+        self._latest: t.Optional[t.Tuple[int, float, Frame]] = None
+        self._running = threading.Event()
+        self._thread: t.Optional[threading.Thread] = None
+        self._last_read_seq = 0
+        # 上一轮被覆盖的帧，延迟一轮确认仍未被读取后再归还缓冲区
+        self._replaced: t.Optional[t.Tuple[int, float, Frame]] = None
+        # 已截取的帧数
+        self.captured = 0
+        # 未被读取就被新帧覆盖的帧数
+        self.dropped = 0
+
+    @property
+    def running(self) -> bool:
+        return self._running.is_set()
+
+    def start(self) -> None:
+        if self.running:
+            return
+        self._running.set()
+        self._thread = threading.Thread(target=self._capture_loop, daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._running.clear()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        self._latest = None
+        self._replaced = None
+
+    def latest(self, newer_than: float = 0.0, timeout_s: float = 10.0) -> Frame:
+        # 返回开始截图时间不早于 newer_than 的最新一帧，没有则等待
+        return self.next(0, newer_than, timeout_s)[1]
+
+    def next(self, after_seq: int, newer_than: float = 0.0, timeout_s: float = 10.0) -> t.Tuple[int, Frame]:
+        # 返回序号大于 after_seq 的最新一帧及其序号，轮询时用于跳过已经看过的帧
+        # 读取方已经释放的帧不会再次返回，等待下一帧
+        deadline = time.time() + timeout_s
+        while True:
+            latest = self._latest
+            if latest is not None and latest[0] > after_seq and latest[1] >= newer_than and not latest[2].released:
+                seq, _, frame = latest
+                self._last_read_seq = max(self._last_read_seq, seq)
+                return seq, frame
+            if not self.running:
+                raise RuntimeError("Frame stream is not running")
+            if time.time() > deadline:
+                raise TimeoutError("No new frame from stream")
+            time.sleep(0.005)
+
+    def _capture_loop(self) -> None:
+        interval = 1 / self.max_fps
+        while self.running:
+            started_at = time.time()
+            try:
+                frame = self._capture()
+            except Exception:
+                # 截图失败时不退出，等待下一轮
+                time.sleep(interval)
+                continue
+            previous = self._latest
+            if previous is not None and previous[0] > self._last_read_seq:
+                self.dropped += 1
+            self.captured += 1
+            self._latest = (self.captured, started_at, frame)
+
+            replaced = self._replaced
+            if replaced is not None and replaced[0] > self._last_read_seq:
+                replaced[2].release()
+            self._replaced = previous
+
+            wait = interval - (time.time() - started_at)
+            if wait > 0:
+                time.sleep(wait)
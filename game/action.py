@@ -1,9 +1,12 @@
 import typing as t
 from . import position
+from .wait import Condition
 
 class Action:
     def __init__(self) -> None:
         self.action_chain: t.List[str] = []
+        # 执行后期望的界面状态，为 None 时固定等待 interval_ms
+        self.postcondition: t.Optional[Condition] = None
 
     def tap(self, x: int, y: int) -> 'Action':
         self.action_chain.append(f"tap {x} {y}")
@@ -13,6 +16,15 @@ class Action:
         self.action_chain.append(f"swipe {x1} {y1} {x2} {y2}")
         return self
 
+    def expect(self, condition: t.Optional[Condition]) -> 'Action':
+        # 返回带有期望状态的副本，escape 等共用的动作不受影响
+        if condition is None:
+            return self
+        expected = Action()
+        expected.action_chain = list(self.action_chain)
+        expected.postcondition = condition
+        return expected
+
 def action():
     return Action()
 
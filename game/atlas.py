@@ -0,0 +1,217 @@
+import typing as t
+import math
+import os
+import threading
+import numpy as np
+from PIL import Image
+
+# 参与配准和拼接的地图区域，四周的按钮和标题栏不随地图移动，需要排除
+MAP_RECT = (120, 120, 1800, 900)
+# 站点落在该区域内时无需拖动
+SAFE_RECT = (240, 180, 1680, 860)
+# 单次拖动的最大距离，与逐屏扫描时相同
+MAX_DRAG = (960, 540)
+SCREEN_CENTER = (960, 540)
+
+
+def correlate(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    """相位相关，返回相关面 r，r[dy, dx] 越大表示 a[y + dy, x + dx] 与 b[y, x] 越吻合
+
+    负的偏移在相关面中回绕到末尾
+    """
+    shape = (max(a.shape[0], b.shape[0]), max(a.shape[1], b.shape[1]))
+    fa = np.fft.rfft2(a - a.mean(), shape)
+    fb = np.fft.rfft2(b - b.mean(), shape)
+    cross = fa * np.conj(fb)
+    cross /= np.abs(cross) + 1e-9
+    return np.fft.irfft2(cross, shape)
+
+
+def find_peak(surface: np.ndarray,
+              low: t.Tuple[int, int],
+              high: t.Tuple[int, int]) -> t.Optional[t.Tuple[int, int]]:
+    """在偏移 [low, high] 范围内找相关峰，峰值不明显时返回 None"""
+    height, width = surface.shape
+    dys = np.arange(low[0], high[0] + 1)
+    dxs = np.arange(low[1], high[1] + 1)
+    window = surface[np.ix_(dys % height, dxs % width)]
+    index = np.unravel_index(int(window.argmax()), window.shape)
+    # 峰值需要明显高于整个相关面的波动
+    if window[index] < 12 * surface.std():
+        return None
+    return int(dys[index[0]]), int(dxs[index[1]])
+
+
+class MapAtlas:
+    """拼接后的世界地图和各站点在地图上的坐标
+
+    坐标以扫描开始时 (左上角) 的屏幕左上角为原点，单位为截图像素，
+    viewport 为当前屏幕左上角在地图上的坐标，站点的屏幕坐标为 站点坐标 - viewport
+    地图只保存 scale 倍缩小的灰度图，用于相位相关定位
+    """
+    def __init__(self, path: t.Optional[str] = None, scale: float = 0.25) -> None:
+        self.path = path or os.path.join(os.getcwd(), "data", "map_atlas.npz")
+        self.scale = scale
+        self.image: t.Optional[np.ndarray] = None
+        # 地图图像左上角对应的坐标
+        self.origin = (0, 0)
+        self.sites: t.Dict[str, t.Tuple[int, int]] = {}
+        # 拖动距离与地图实际移动距离之比
+        self.gain = (1.0, 1.0)
+        self._screens: t.List[t.Tuple[t.Tuple[int, int], np.ndarray]] = []
+        self._labels: t.Dict[str, t.List[t.Tuple[int, int]]] = {}
+        self._gains: t.List[t.Tuple[float, float]] = []
+        self._lock = threading.Lock()
+        self.load()
+
+    @property
+    def ready(self) -> bool:
+        return self.image is not None and bool(self.sites)
+
+    def load(self) -> None:
+        if not os.path.exists(self.path):
+            return
+        with np.load(self.path) as data:
+            self.image = data["image"]
+            self.origin = tuple(int(value) for value in data["origin"])
+            self.gain = tuple(float(value) for value in data["gain"])
+            self.sites = {
+                str(name): (int(x), int(y)) for name, (x, y) in zip(data["site_names"], data["site_positions"])
+            }
+
+    def save(self) -> None:
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        np.savez_compressed(
+            self.path,
+            image=self.image,
+            origin=np.array(self.origin),
+            gain=np.array(self.gain),
+            site_names=np.array(list(self.sites)),
+            site_positions=np.array(list(self.sites.values())).reshape(-1, 2),
+        )
+
+    def _map_view(self, image: Image.Image) -> np.ndarray:
+        # 地图区域的缩小灰度图
+        width = int((MAP_RECT[2] - MAP_RECT[0]) * self.scale)
+        height = int((MAP_RECT[3] - MAP_RECT[1]) * self.scale)
+        gray = image.crop(MAP_RECT).convert("L").resize((width, height), Image.BOX)
+        return np.asarray(gray, dtype=np.float32)
+
+    # ---------------- 扫描 ----------------
+
+    def begin_survey(self) -> None:
+        self._screens = []
+        self._labels = {}
+        self._gains = []
+
+    def add_screen(self,
+                   image: Image.Image,
+                   drag: t.Tuple[int, int] = (0, 0),
+                   labels: t.Iterable[t.Tuple[int, int, str]] = ()) -> t.Tuple[int, int]:
+        """加入扫描时的一屏，drag 为到达这一屏前的拖动向量，labels 为屏幕上识别到的站点
+
+        返回这一屏的 viewport
+        """
+        view = self._map_view(image)
+        if not self._screens:
+            viewport = (0, 0)
+        else:
+            (last_x, last_y), last_view = self._screens[-1]
+            # 拖动方向与地图移动方向相反，在地图边缘时可能不移动
+            expected = (-drag[1] * self.scale, -drag[0] * self.scale)
+            margin = 16
+            low = tuple(int(min(0, value)) - margin for value in expected)
+            high = tuple(int(max(0, value)) + margin for value in expected)
+            peak = find_peak(correlate(last_view, view), low, high)
+            if peak is None:
+                # 配准失败时按拖动距离估计
+                peak = (int(expected[0]), int(expected[1]))
+            dy, dx = peak
+            viewport = (last_x + round(dx / self.scale), last_y + round(dy / self.scale))
+            if drag[0] and abs(dx) > abs(expected[1]) / 2:
+                self._gains.append((-dx / self.scale / drag[0], 0.0))
+            if drag[1] and abs(dy) > abs(expected[0]) / 2:
+                self._gains.append((0.0, -dy / self.scale / drag[1]))
+        self._screens.append((viewport, view))
+        for x, y, name in labels:
+            self._labels.setdefault(name, []).append((viewport[0] + x, viewport[1] + y))
+        return viewport
+
+    def finish_survey(self) -> None:
+        if not self._screens:
+            return
+        # 按各屏的 viewport 拼接，后面的屏覆盖前面的
+        positions = [
+            (round((x + MAP_RECT[0]) * self.scale), round((y + MAP_RECT[1]) * self.scale))
+            for (x, y), _ in self._screens
+        ]
+        left = min(x for x, _ in positions)
+        top = min(y for _, y in positions)
+        view_height, view_width = self._screens[0][1].shape
+        width = max(x for x, _ in positions) - left + view_width
+        height = max(y for _, y in positions) - top + view_height
+        canvas = np.full((height, width), np.mean([view.mean() for _, view in self._screens]), dtype=np.float32)
+        for (x, y), (_, view) in zip(positions, self._screens):
+            canvas[y - top:y - top + view_height, x - left:x - left + view_width] = view
+
+        gains_x = [gain for gain, _ in self._gains if gain]
+        gains_y = [gain for _, gain in self._gains if gain]
+        with self._lock:
+            self.image = canvas
+            self.origin = (round(left / self.scale), round(top / self.scale))
+            self.gain = (
+                float(np.median(gains_x)) if gains_x else 1.0,
+                float(np.median(gains_y)) if gains_y else 1.0,
+            )
+            self.sites = {
+                name: (round(np.mean([x for x, _ in points])), round(np.mean([y for _, y in points])))
+                for name, points in self._labels.items()
+            }
+        self._screens = []
+        self.save()
+
+    # ---------------- 定位 ----------------
+
+    def locate(self, image: Image.Image) -> t.Optional[t.Tuple[int, int]]:
+        """由一帧截图估计当前 viewport，无法定位时返回 None"""
+        if self.image is None:
+            return None
+        view = self._map_view(image)
+        height, width = self.image.shape
+        # 扫描时可能没有到达地图的最边缘，允许画面超出拼接图一部分
+        margin = 32
+        low = (-margin, -margin)
+        high = (max(height - view.shape[0], 0) + margin, max(width - view.shape[1], 0) + margin)
+        peak = find_peak(correlate(self.image, view), low, high)
+        if peak is None:
+            return None
+        dy, dx = peak
+        return (
+            round(dx / self.scale) + self.origin[0] - MAP_RECT[0],
+            round(dy / self.scale) + self.origin[1] - MAP_RECT[1],
+        )
+
+    def screen_position(self, viewport: t.Tuple[int, int], name: str) -> t.Optional[t.Tuple[int, int]]:
+        if name not in self.sites:
+            return None
+        x, y = self.sites[name]
+        return x - viewport[0], y - viewport[1]
+
+    def plan(self, viewport: t.Tuple[int, int], name: str) -> t.List[t.Tuple[int, int, int, int]]:
+        """把站点拖到屏幕中部所需的最少拖动，返回 swipe 的起点和终点"""
+        position = self.screen_position(viewport, name)
+        if position is None:
+            raise ValueError(f"Site {name} not in atlas")
+        x, y = position
+        if SAFE_RECT[0] <= x <= SAFE_RECT[2] and SAFE_RECT[1] <= y <= SAFE_RECT[3]:
+            return []
+        # 地图需要移动的距离换算为拖动距离，横竖方向合并为斜向拖动
+        drag_x = -(x - SCREEN_CENTER[0]) / self.gain[0]
+        drag_y = -(y - SCREEN_CENTER[1]) / self.gain[1]
+        count = max(math.ceil(abs(drag_x) / MAX_DRAG[0]), math.ceil(abs(drag_y) / MAX_DRAG[1]), 1)
+        step_x, step_y = drag_x / count, drag_y / count
+        swipe = (
+            int(SCREEN_CENTER[0] - step_x / 2), int(SCREEN_CENTER[1] - step_y / 2),
+            int(SCREEN_CENTER[0] + step_x / 2), int(SCREEN_CENTER[1] + step_y / 2),
+        )
+        return [swipe] * count
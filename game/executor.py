@@ -1,15 +1,41 @@
-from emulator.adb import ADBClient
+from emulator.adb import ADBClient, BaseADBClient
+from emulator.async_adb import AsyncADBClient
+from emulator.frame import Frame
+from emulator.stream import FrameStream
 from .action import Action
-from time import sleep
+from .wait import Check
+from time import sleep, time
 import typing as t
-from threading import Event
+from threading import Event, Thread
+from contextlib import contextmanager
+import asyncio
 import sys
 
+
+def shell_command(client: BaseADBClient, command: str) -> str:
+    # 将动作链中的命令翻译为设备端的 shell 命令
+    if "tap" in command:
+        x, y = command.split(" ")[1:]
+        return client.tap_command(int(x), int(y))
+    elif "swipe" in command:
+        x1, y1, x2, y2 = command.split(" ")[1:]
+        return client.swipe_command(int(x1), int(y1), int(x2), int(y2))
+    else:
+        raise ValueError(f"Invalid command: {command}")
+
+
 class Executor:
-    def __init__(self) -> None:
+    def __init__(self, **client_options: t.Any) -> None:
+        # 创建 ADBClient 时使用的参数，例如设备地址
+        self.client_options = client_options
         self._client: t.Optional[ADBClient] = None
         self.event: t.Optional[Event] = None
         self.callback: t.Optional[t.Callable] = None
+        self.stream: t.Optional[FrameStream] = None
+        # 最近一次动作完成的时间，之前开始截取的帧不再有效
+        self._last_action_at = 0.0
+        # 已发送的命令数
+        self.commands_sent = 0
 
     def set_event(self, event: Event) -> None:
         self.event = event
@@ -17,41 +43,241 @@ class Executor:
     def set_callback(self, callback: t.Callable) -> None:
         self.callback = callback
 
-    @property
-    def client(self) -> ADBClient:
+    def _check_stop(self) -> None:
         # 如果 event 被设置，则退出
         if self.event is not None and self.event.is_set():
             if self.callback is not None:
                 self.callback()
             sys.exit(0)
+
+    @property
+    def client(self) -> ADBClient:
+        self._check_stop()
         if self._client is None:
             print("ADB正在加载中...")
-            self._client = ADBClient()
+            self._client = ADBClient(**self.client_options)
         return self._client
 
-    def execute(self, action: Action, interval_ms: int = 2500) -> None:
-        for command in action.action_chain:
-            if "tap" in command:
-                x, y = command.split(" ")[1:]
-                self.client.tap(int(x), int(y))
-            elif "swipe" in command:
-                x1, y1, x2, y2 = command.split(" ")[1:]
-                self.client.swipe(int(x1), int(y1), int(x2), int(y2))
+    @property
+    def connected(self) -> bool:
+        return self._client is not None
+
+    def execute(self, 
+                action: Action, 
+                interval_ms: int = 2500, 
+                batch: t.Optional[bool] = None) -> None:
+        if batch is None:
+            batch = self.client.batch_execute
+        check: t.Optional[Check] = None
+        if action.postcondition is not None and self.adaptive_wait:
+            # 在动作执行前开始，条件可以截取动作前的帧作为参照
+            check = action.postcondition.begin(self.screenshot)
+
+        if batch and len(action.action_chain) > 1:
+            # 整条动作链编译为一个设备端脚本，一次往返执行完毕
+            commands = [shell_command(self.client, command) for command in action.action_chain]
+            self.client.run_script(commands, interval_ms)
+            self.commands_sent += len(commands)
+            self._last_action_at = time()
+            self._settle(action, check, interval_ms)
+            return
+
+        for i, command in enumerate(action.action_chain):
+            self.client._send_shell(shell_command(self.client, command))
+            self.commands_sent += 1
+            self._last_action_at = time()
+            if i < len(action.action_chain) - 1:
+                sleep(interval_ms / 1000)
             else:
-                raise ValueError(f"Invalid command: {command}")
+                self._settle(action, check, interval_ms)
+
+    @property
+    def adaptive_wait(self) -> bool:
+        return self.client.adaptive_wait
+
+    def _settle(self, action: Action, check: t.Optional[Check], interval_ms: int) -> None:
+        # 只有最后一条命令之后按期望状态等待，动作链中间仍使用固定间隔
+        if check is None:
             sleep(interval_ms / 1000)
-            
-    def screenshot(self) -> bytes:
-        return self.client.screenshot()
+        else:
+            self.wait_until(check, action.postcondition.timeout_s)
+
+    def wait_until(self, check: Check, timeout_s: float, poll_ms: int = 100) -> bool:
+        """轮询截图直到 check 返回 True，超时返回 False
+
+        使用截图流时每一帧只检查一次，等待下一帧到达，不会重复检查同一帧
+        """
+        deadline = time() + timeout_s
+        seq = 0
+        while True:
+            self._check_stop()
+            streaming = self.stream is not None and self.stream.running
+            if streaming:
+                seq, frame = self.stream.next(seq, newer_than=self._last_action_at,
+                                              timeout_s=max(deadline - time(), 0) + 1)
+            else:
+                frame = self.screenshot()
+            with frame:
+                if check(frame):
+                    return True
+            if time() > deadline:
+                print("等待界面响应超时")
+                return False
+            if not streaming:
+                sleep(poll_ms / 1000)
+
+
+    def screenshot(self) -> Frame:
+        if self.stream is not None and self.stream.running:
+            # 使用后台截图流中最近一次动作之后的帧
+            return self.stream.latest(newer_than=self._last_action_at)
+        return self.client.capture()
+
+    def start_stream(self, max_fps: t.Optional[float] = None) -> None:
+        client = self.client
+        if self.stream is None:
+            self.stream = FrameStream(self._stream_capture(), max_fps or client.stream_fps)
+        else:
+            # 未指定时恢复配置的帧率，不沿用上一次的设置
+            self.stream.max_fps = max_fps or client.stream_fps
+        self.stream.start()
+
+    def _stream_capture(self) -> t.Callable[[], Frame]:
+        # 后台线程直接使用客户端截图，不经过 client 属性的退出检查
+        return self.client.capture
+
+    def stop_stream(self) -> None:
+        if self.stream is not None:
+            # 保留 stream 对象以便查看截取和丢弃的帧数
+            self.stream.stop()
+
+    @contextmanager
+    def streaming(self, max_fps: t.Optional[float] = None) -> t.Iterator[None]:
+        self.start_stream(max_fps)
+        try:
+            yield
+        finally:
+            self.stop_stream()
     
     
     def stop_client(self) -> None:
+        self.stop_stream()
+        self.stream = None
         if self._client is not None:
             self._client.stop_server()
             self._client = None
 
+    def close_client(self) -> None:
+        # 关闭连接但不关闭 adb server
+        self.stop_stream()
+        self.stream = None
+        if self._client is not None:
+            self._client.close()
+            self._client = None
+
 
     def kill_client(self) -> None:
+        self.stop_stream()
+        self.stream = None
         if self._client is not None:
             self._client.stop_server()
             self._client = None
+
+
+
+class AsyncExecutor:
+    """Executor 的 asyncio 版本"""
+    def __init__(self,
+                 device_host: t.Optional[str] = None,
+                 device_port: t.Optional[int] = None) -> None:
+        self.device_host = device_host
+        self.device_port = device_port
+        self._client: t.Optional[AsyncADBClient] = None
+        self.last_action_at = 0.0
+
+    @property
+    def client(self) -> AsyncADBClient:
+        if self._client is None:
+            print("ADB正在加载中...")
+            self._client = AsyncADBClient(self.device_host, self.device_port)
+        return self._client
+
+    async def execute(self,
+                      action: Action,
+                      interval_ms: int = 2500,
+                      batch: t.Optional[bool] = None) -> None:
+        await self.client.prepare_touch()
+        if batch is None:
+            batch = self.client.batch_execute
+        if batch and len(action.action_chain) > 1:
+            commands = [shell_command(self.client, command) for command in action.action_chain]
+            await self.client.run_script(commands, interval_ms)
+            self.last_action_at = time()
+            await asyncio.sleep(interval_ms / 1000)
+            return
+
+        for command in action.action_chain:
+            await self.client._send_shell(shell_command(self.client, command))
+            self.last_action_at = time()
+            await asyncio.sleep(interval_ms / 1000)
+
+    async def screenshot(self) -> Frame:
+        return await self.client.capture()
+
+    async def close(self) -> None:
+        if self._client is not None:
+            await self._client.close()
+            self._client.kill_server()
+            self._client = None
+
+
+class SyncExecutor(Executor):
+    """在后台事件循环中驱动 AsyncExecutor，对外保持 Executor 的同步接口，现有助手可以直接使用"""
+    def __init__(self,
+                 device_host: t.Optional[str] = None,
+                 device_port: t.Optional[int] = None) -> None:
+        super().__init__()
+        self.async_executor = AsyncExecutor(device_host, device_port)
+        self.loop = asyncio.new_event_loop()
+        Thread(target=self.loop.run_forever, daemon=True).start()
+
+    @property
+    def adaptive_wait(self) -> bool:
+        # 异步执行器总是按固定间隔等待
+        return False
+
+    def _run(self, coroutine: t.Coroutine) -> t.Any:
+        return asyncio.run_coroutine_threadsafe(coroutine, self.loop).result()
+
+    @property
+    def client(self) -> AsyncADBClient:
+        self._check_stop()
+        return self.async_executor.client
+
+    def execute(self,
+                action: Action,
+                interval_ms: int = 2500,
+                batch: t.Optional[bool] = None) -> None:
+        self._check_stop()
+        self._run(self.async_executor.execute(action, interval_ms, batch))
+        self._last_action_at = self.async_executor.last_action_at
+
+    def screenshot(self) -> Frame:
+        if self.stream is not None and self.stream.running:
+            return self.stream.latest(newer_than=self._last_action_at)
+        self._check_stop()
+        return self._run(self.async_executor.screenshot())
+
+    def _stream_capture(self) -> t.Callable[[], Frame]:
+        return lambda: self._run(self.async_executor.screenshot())
+
+    def stop_client(self) -> None:
+        self.stop_stream()
+        self.stream = None
+        self._run(self.async_executor.close())
+
+    def close_client(self) -> None:
+        self.stop_client()
+
+    def kill_client(self) -> None:
+        self.stop_client()
@@ -0,0 +1,167 @@
+import typing as t
+import os
+import threading
+import time
+import numpy as np
+from PIL import Image
+from . import position
+
+# 整屏缩略图的大小
+THUMBNAIL_SIZE = (32, 18)
+# 锚点区域缩放后的大小
+ANCHOR_SIZE = (24, 6)
+# 锚点区域，同类场景的整屏布局相近，靠这些区域的文字区分
+ANCHORS = (
+    # 顶部标题栏
+    (0, 0, 800, 110),
+    # 站点名称
+    position.station_name_rect,
+    # 右下角按钮
+    (1400, 960, 1920, 1080),
+)
+
+
+def features(image: Image.Image) -> np.ndarray:
+    """缩略图和锚点区域的灰度值，取值 0 到 1"""
+    # 先整张转灰度，单通道缩放比 RGBA 快得多
+    gray = image.convert("L")
+    parts = [gray.resize(THUMBNAIL_SIZE, Image.BOX)]
+    parts.extend(gray.resize(ANCHOR_SIZE, Image.BOX, box=rect) for rect in ANCHORS)
+    return np.concatenate([np.asarray(part, dtype=np.float32).ravel() for part in parts]) / 255
+
+
+class SceneFingerprints:
+    """整屏场景识别
+
+    参考截图保存在 data/scene_fingerprints/<场景名>/ 下，
+    特征矩阵缓存在 index.npz，识别时一次计算与所有参考截图的平均灰度差 (0 到 255)，
+    最近的场景差值不超过 max_distance，且其他场景的差值至少是它的 margin 倍时才认为匹配
+    """
+    def __init__(self,
+                 directory: t.Optional[str] = None,
+                 max_distance: float = 12.0,
+                 margin: float = 1.5,
+                 max_captures: int = 3) -> None:
+        self.directory = directory or os.path.join(os.getcwd(), "data", "scene_fingerprints")
+        self.max_distance = max_distance
+        self.margin = margin
+        self.max_captures = max_captures
+        self._names: t.Optional[t.List[str]] = None
+        self._matrix = np.zeros((0, 0), dtype=np.float32)
+        self._lock = threading.Lock()
+
+    @property
+    def index_path(self) -> str:
+        return os.path.join(self.directory, "index.npz")
+
+    def _load(self) -> t.List[str]:
+        if self._names is None:
+            if os.path.exists(self.index_path):
+                with np.load(self.index_path) as index:
+                    self._names = [str(name) for name in index["names"]]
+                    self._matrix = index["features"]
+            else:
+                self._rebuild()
+        return self._names
+
+    def _rebuild(self) -> None:
+        # 从参考截图重新计算特征矩阵，特征的定义改变后删除 index.npz 即可
+        names, rows = [], []
+        if os.path.isdir(self.directory):
+            for name in sorted(os.listdir(self.directory)):
+                scene_dir = os.path.join(self.directory, name)
+                if not os.path.isdir(scene_dir):
+                    continue
+                for file_name in sorted(os.listdir(scene_dir)):
+                    with Image.open(os.path.join(scene_dir, file_name)) as image:
+                        rows.append(features(image))
+                    names.append(name)
+        self._names = names
+        self._matrix = np.stack(rows) if rows else np.zeros((0, 0), dtype=np.float32)
+        self._save_index()
+
+    def _save_index(self) -> None:
+        if not self._names:
+            return
+        os.makedirs(self.directory, exist_ok=True)
+        np.savez(self.index_path, names=np.array(self._names), features=self._matrix)
+
+    def captures(self, scene_name: str) -> int:
+        with self._lock:
+            return self._load().count(scene_name)
+
+    def needs(self, scene_name: str) -> bool:
+        return self.captures(scene_name) < self.max_captures
+
+    def _distances(self, image: Image.Image) -> t.Tuple[t.List[str], np.ndarray]:
+        query = features(image)
+        with self._lock:
+            names = self._load()
+            if not names:
+                return [], np.zeros(0, dtype=np.float32)
+            return names, np.abs(self._matrix - query).mean(axis=1) * 255
+
+    def nearest(self, image: Image.Image) -> t.Optional[t.Tuple[str, float]]:
+        """返回最近的场景名和平均灰度差，不要求与其他场景拉开差距
+
+        用于确认是否到达已知的目标场景，相似的场景之间不会因为区分不开而一直等待
+        """
+        names, distances = self._distances(image)
+        if not names:
+            return None
+        best = int(distances.argmin())
+        if distances[best] > self.max_distance:
+            return None
+        return names[best], float(distances[best])
+
+    def match(self, image: Image.Image) -> t.Optional[t.Tuple[str, float]]:
+        """返回场景名和平均灰度差，无法确定时返回 None"""
+        names, distances = self._distances(image)
+        if not names:
+            return None
+        best = int(distances.argmin())
+        if distances[best] > self.max_distance:
+            return None
+        others = distances[np.array(names) != names[best]]
+        if len(others) and others.min() < distances[best] * self.margin:
+            # 与其他场景区分不开
+            return None
+        return names[best], float(distances[best])
+
+    def learn(self, scene_name: str, image: Image.Image, force: bool = False) -> bool:
+        """保存一张已确认场景的参考截图，已有足够截图或与其他场景冲突时跳过，force 为 True 时总是保存"""
+        if not force:
+            if not self.needs(scene_name):
+                return False
+            matched = self.match(image)
+            if matched is not None and matched[0] != scene_name:
+                return False
+        row = features(image)
+        scene_dir = os.path.join(self.directory, scene_name)
+        with self._lock:
+            names = self._load()
+            os.makedirs(scene_dir, exist_ok=True)
+            image.convert("RGB").save(os.path.join(scene_dir, f"{time.time_ns()}.jpg"), quality=90)
+            names.append(scene_name)
+            self._matrix = np.vstack([self._matrix.reshape(-1, len(row)), row])
+            self._save_index()
+        return True
+
+
+# 场景识别和动作等待共用的指纹库
+fingerprints = SceneFingerprints()
+
+
+if __name__ == '__main__':
+    # 用法: python -m game.fingerprint [场景名]
+    # 带场景名时把当前截图保存为该场景的参考截图，否则识别当前截图
+    import sys
+    from emulator.adb import ADBClient
+    fingerprints = SceneFingerprints()
+    image = ADBClient().capture().image
+    if len(sys.argv) > 1:
+        fingerprints.learn(sys.argv[1], image, force=True)
+        print(f"{sys.argv[1]}: {fingerprints.captures(sys.argv[1])} 张参考截图")
+    else:
+        start = time.perf_counter()
+        print(fingerprints.match(image), f"{(time.perf_counter() - start) * 1000:.1f} ms")
@@ -0,0 +1,162 @@
+import configparser
+import os
+import threading
+import time
+import traceback
+import typing as t
+from .executor import Executor
+from .helper import ResonanceHelper
+from .rail import RailController
+
+
+HelperFactory = t.Callable[[Executor, RailController, t.Callable], ResonanceHelper]
+
+
+class DeviceWorker:
+    """一台设备的执行器、行驶控制器、助手和工作线程"""
+    def __init__(self, device_host: str, device_port: int, **client_options: t.Any) -> None:
+        self.serial = f"{device_host}:{device_port}"
+        self.event = threading.Event()
+        self.executor = Executor(device_host=device_host, device_port=device_port, **client_options)
+        self.executor.set_event(self.event)
+        self.executor.set_callback(self.on_stopped)
+        self.rail_controller = RailController(self.executor)
+        self.helper: t.Optional[ResonanceHelper] = None
+        self.thread: t.Optional[threading.Thread] = None
+        self.status = "空闲"
+        self.started_at: t.Optional[float] = None
+        self.stopped_at: t.Optional[float] = None
+
+    @property
+    def running(self) -> bool:
+        return self.thread is not None and self.thread.is_alive()
+
+    def on_stopped(self) -> None:
+        # 助手和执行器都可能调用，只记录第一次
+        if self.status == "运行中":
+            self.status = "已停止" if self.event.is_set() else "出错"
+
+    def elapsed(self) -> float:
+        if self.started_at is None:
+            return 0.0
+        return (self.stopped_at or time.time()) - self.started_at
+
+    def summary(self) -> t.Dict[str, t.Any]:
+        elapsed = self.elapsed()
+        commands = self.executor.commands_sent
+        stream = self.executor.stream
+        return {
+            "serial": self.serial,
+            "status": self.status,
+            "elapsed_s": elapsed,
+            "commands": commands,
+            "commands_per_min": commands / elapsed * 60 if elapsed > 0 else 0.0,
+            "frames": stream.captured if stream is not None else 0,
+        }
+
+
+class Fleet:
+    """多台模拟器在同一进程中并行运行，OCR 模型等重量级资源共用"""
+    def __init__(self,
+                 devices: t.Sequence[t.Tuple[str, int]],
+                 callback: t.Optional[t.Callable] = None,
+                 **client_options: t.Any) -> None:
+        if not devices:
+            raise ValueError("No device configured")
+        self.workers = [DeviceWorker(host, port, **client_options) for host, port in devices]
+        # 所有设备都停止后调用
+        self.callback = callback
+        self._lock = threading.Lock()
+        self._active = 0
+
+    @classmethod
+    def from_config(cls, callback: t.Optional[t.Callable] = None) -> 'Fleet':
+        config = configparser.ConfigParser()
+        config_file_abs_path = os.path.join(os.getcwd(), "adb.ini")
+        config.read(config_file_abs_path)
+
+        devices = []
+        for serial in config.get("ADB", "devices", fallback="").split(","):
+            if serial.strip():
+                host, port = serial.strip().rsplit(":", 1)
+                devices.append((host, int(port)))
+        if not devices:
+            devices.append((config.get("ADB", "device_host"), config.getint("ADB", "device_port")))
+        return cls(devices, callback)
+
+    def __len__(self) -> int:
+        return len(self.workers)
+
+    @property
+    def running(self) -> bool:
+        return any(worker.running for worker in self.workers)
+
+    def start(self, helper_factory: HelperFactory, *args: t.Any) -> None:
+        # 每台设备使用各自的助手执行同一个任务
+        for worker in self.workers:
+            if worker.running:
+                continue
+            worker.event.clear()
+            worker.helper = helper_factory(worker.executor, worker.rail_controller, worker.on_stopped)
+            worker.status = "运行中"
+            worker.started_at = time.time()
+            worker.stopped_at = None
+            with self._lock:
+                self._active += 1
+            worker.thread = threading.Thread(
+                target=self._run,
+                args=(worker, args),
+                name=worker.serial,
+                daemon=True
+            )
+            worker.thread.start()
+
+    def _run(self, worker: DeviceWorker, args: t.Tuple[t.Any, ...]) -> None:
+        try:
+            worker.helper.run(*args)
+        except SystemExit:
+            pass
+        except Exception:
+            print(f"[{worker.serial}] 运行出错")
+            traceback.print_exc()
+            worker.on_stopped()
+        finally:
+            if worker.status == "运行中":
+                worker.status = "已停止" if worker.event.is_set() else "已完成"
+            worker.stopped_at = time.time()
+            with self._lock:
+                self._active -= 1
+                all_stopped = self._active == 0
+            if all_stopped and self.callback is not None:
+                self.callback()
+
+    def stop(self) -> None:
+        for worker in self.workers:
+            worker.event.set()
+
+    def join(self) -> None:
+        for worker in self.workers:
+            if worker.thread is not None:
+                worker.thread.join()
+
+    def close(self) -> None:
+        # 所有设备共用一个 adb server，关闭其他连接后由最后一个已连接的设备关闭一次
+        connected = [worker for worker in self.workers if worker.executor.connected]
+        for worker in connected[:-1]:
+            worker.executor.close_client()
+        if connected:
+            connected[-1].executor.stop_client()
+
+    def status(self) -> t.List[t.Dict[str, t.Any]]:
+        return [worker.summary() for worker in self.workers]
+
+    def report(self) -> str:
+        lines = []
+        for summary in self.status():
+            lines.append(
+                f"{summary['serial']}: {summary['status']}, "
+                f"运行 {summary['elapsed_s'] / 60:.1f} 分钟, "
+                f"命令 {summary['commands']} 条 ({summary['commands_per_min']:.1f} 条/分钟), "
+                f"截图 {summary['frames']} 帧"
+            )
+        return "\n".join(lines)
@@ -1,4 +1,5 @@
 from .rail import Site
+from .matcher import FuzzyIndex
 import typing as t
 
 class Goods:
@@ -130,6 +131,8 @@ for goods_list in GOODS_MAPPING.values():
         if goods not in ALL_GOODS:
             ALL_GOODS.append(goods)
 
+GOODS_INDEX = FuzzyIndex(goods.name for goods in ALL_GOODS)
+
 if __name__ == '__main__':
     a = Goods("发动机")
     b = [Goods("发动机"), Goods("弹丸加速装置")]
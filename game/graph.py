@@ -0,0 +1,156 @@
+import typing as t
+import heapq
+import json
+import os
+import threading
+import numpy as np
+from .matcher import FuzzyIndex
+from .rail import Rail
+
+if t.TYPE_CHECKING:
+    from .scene import Scene
+
+
+# 没有测量过的连线的估计耗时 (秒)
+RAIL_COST_S = 120.0
+ACTION_COST_S = 3.0
+
+
+class EdgeCosts:
+    """场景之间每一步的耗时 (秒)
+
+    每次测量按指数加权平均更新，alpha 为新测量值的权重，结果保存为 json，多次运行之间共享
+    """
+    def __init__(self, path: str, alpha: float = 0.3) -> None:
+        self.path = path
+        self.alpha = alpha
+        self._costs: t.Dict[str, float] = {}
+        self._lock = threading.Lock()
+        try:
+            with open(path, encoding="utf-8") as f:
+                self._costs = {key: float(value) for key, value in json.load(f).items()}
+        except (OSError, ValueError):
+            # 文件不存在或损坏时从估计值开始
+            pass
+
+    @staticmethod
+    def key(source_name: str, target_name: str) -> str:
+        return f"{source_name}->{target_name}"
+
+    def get(self, source_name: str, target_name: str, default: float) -> float:
+        return self._costs.get(self.key(source_name, target_name), default)
+
+    def update(self, source_name: str, target_name: str, seconds: float) -> float:
+        key = self.key(source_name, target_name)
+        with self._lock:
+            previous = self._costs.get(key)
+            cost = seconds if previous is None else previous + self.alpha * (seconds - previous)
+            self._costs[key] = cost
+            self._save()
+        return cost
+
+    def _save(self) -> None:
+        try:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            # 先写临时文件再替换，多开时不会读到写了一半的文件
+            temp_path = f"{self.path}.tmp"
+            with open(temp_path, "w", encoding="utf-8") as f:
+                json.dump(self._costs, f, ensure_ascii=False, indent=1, sort_keys=True)
+            os.replace(temp_path, self.path)
+        except OSError:
+            pass
+
+
+class SceneGraph:
+    """场景图的索引，场景连线完成后建立一次
+
+    场景编号为 scene_list 中的下标，next_hop[source, target] 为从 source 到 target 的最快路径上的下一个场景，
+    不可达时为 -1，查找路径只需沿着 next_hop 走，不需要搜索
+    每条连线的耗时取自 EdgeCosts，测量到新的耗时后重新计算 next_hop
+    """
+    def __init__(self, scenes: t.Sequence['Scene'], costs: t.Optional[EdgeCosts] = None) -> None:
+        self.scenes = list(scenes)
+        self.costs = costs
+        self.ids: t.Dict['Scene', int] = {scene: i for i, scene in enumerate(self.scenes)}
+        self.name_ids: t.Dict[str, int] = {scene.name: i for i, scene in enumerate(self.scenes)}
+        # 邻接表按连线的先后顺序排列
+        self.adjacency: t.List[t.List[int]] = [
+            [self.ids[next_scene] for next_scene in scene._next_scenes] for scene in self.scenes
+        ]
+        self.actions: t.List[t.Dict[int, t.Any]] = [
+            {self.ids[next_scene]: action for next_scene, action in scene._next_scenes.items()}
+            for scene in self.scenes
+        ]
+        self.weights = self._build_weights()
+        self.next_hop = self._build_next_hop()
+        # 场景名称的模糊匹配索引
+        self.name_index = FuzzyIndex(self.name_ids)
+        self._lock = threading.Lock()
+
+    def _weight(self, source: int, target: int) -> float:
+        default = RAIL_COST_S if isinstance(self.actions[source][target], Rail) else ACTION_COST_S
+        if self.costs is None:
+            return default
+        return self.costs.get(self.scenes[source].name, self.scenes[target].name, default)
+
+    def _build_weights(self) -> t.List[t.List[float]]:
+        return [[self._weight(source, target) for target in neighbors] for source, neighbors in enumerate(self.adjacency)]
+
+    def _build_next_hop(self) -> np.ndarray:
+        count = len(self.scenes)
+        next_hop = np.full((count, count), -1, dtype=np.int32)
+        for source in range(count):
+            # 从每个场景出发做一次 Dijkstra，记录到达每个场景时经过的第一步
+            first_step = next_hop[source]
+            first_step[source] = source
+            distances = [float("inf")] * count
+            distances[source] = 0.0
+            heap = [(0.0, source)]
+            while heap:
+                distance, vertex = heapq.heappop(heap)
+                if distance > distances[vertex]:
+                    continue
+                for neighbor, weight in zip(self.adjacency[vertex], self.weights[vertex]):
+                    # 耗时相同时保留先找到的路径
+                    if distance + weight < distances[neighbor]:
+                        distances[neighbor] = distance + weight
+                        first_step[neighbor] = neighbor if vertex == source else first_step[vertex]
+                        heapq.heappush(heap, (distances[neighbor], neighbor))
+        return next_hop
+
+    def record(self, source: 'Scene', target: 'Scene', seconds: float) -> float:
+        """记录一步的实际耗时，返回更新后的估计值"""
+        if self.costs is None:
+            return seconds
+        cost = self.costs.update(source.name, target.name, seconds)
+        with self._lock:
+            source_id, target_id = self.ids[source], self.ids[target]
+            self.weights[source_id][self.adjacency[source_id].index(target_id)] = cost
+            self.next_hop = self._build_next_hop()
+        return cost
+
+    def scene(self, name: str) -> t.Optional['Scene']:
+        scene_id = self.name_ids.get(name)
+        return self.scenes[scene_id] if scene_id is not None else None
+
+    def edge(self, source: 'Scene', target_name: str) -> t.Tuple['Scene', t.Any]:
+        target = self.name_ids.get(target_name)
+        action = self.actions[self.ids[source]].get(target) if target is not None else None
+        if action is None:
+            raise ValueError(f"Scene {target_name} not found")
+        return self.scenes[target], action
+
+    def route(self, source: 'Scene', target_name: str) -> t.List['Scene']:
+        """返回从 source 到 target_name 经过的场景，不包括 source"""
+        target = self.name_ids.get(target_name)
+        if target is None:
+            raise ValueError(f"Scene {target_name} not found")
+        vertex = self.ids[source]
+        next_hop = self.next_hop
+        if next_hop[vertex, target] == -1:
+            raise ValueError(f"No route from {source.name} to {target_name}")
+        route = []
+        while vertex != target:
+            vertex = int(next_hop[vertex, target])
+            route.append(self.scenes[vertex])
+        return route
@@ -3,11 +3,11 @@ from .rail import Rail, RailController, Site
 from .action import Action
 from . import scene
 import typing as t
-from collections import deque
 import time
-from ocr import ocr
-from io import BytesIO
-from PIL import Image
+import numpy as np
+from .template import has_label
+from .fingerprint import fingerprints
+from .wait import ScreenSettled, changed, scene_reached, thumbnail
 from . import position
 from .action import action
 from threading import Event
@@ -28,44 +28,65 @@ class ResonanceHelper(ABC):
         self.is_first_exchange = True
 
     def check_scene(self):
-        self._scene = scene.Scene.from_image(self.executor.screenshot())
+        with self.executor.screenshot() as frame:
+            self._scene = scene.Scene.from_image(frame)
         if self._scene is None:
             raise ValueError("Cannot detect scene")
         print(f"检测到目前界面处于：{self._scene.name}")
 
     def bfs(self, target_scene_name: str) -> t.List[str]:
         print(f"目标地点：{target_scene_name}，正在寻找路径...")
-        start = self._scene
-        queue = deque([(start, tuple())])
-        visited = set()
-        while queue:
-            vertex, trace = queue.popleft()
-
-            if vertex.name == target_scene_name:
-                # 如果找到目标节点，跳出循环
-                break
-            else:
-                # 如果没有匹配上，则将当前节点的邻居节点加入队列
-                if vertex not in visited:
-                    visited.add(vertex)
-                    for scene, _ in vertex._next_scenes.items():
-                        queue.append((scene, trace + (scene.name,)))
-        
-        # 返回路径
-        print(f"路径已确定：{' -> '.join((self._scene.name, ) + trace)}")
-        return list(trace)
+        # 路径由场景图预先计算的下一跳表给出，按实测耗时选择最快的路径
+        trace = [scene.name for scene in self._scene.route(target_scene_name)]
+        print(f"路径已确定：{' -> '.join([self._scene.name] + trace)}")
+        return trace
         
     def goto(self, route: t.List[str], interval_ms: int = 2000):
         for scene_name in route:
             next_scene, action = self._scene.goto(scene_name)
+            before: t.Optional[np.ndarray] = None
+            if fingerprints.needs(next_scene.name):
+                # 动作前的整屏缩略图，用于确认画面确实切换了
+                with self.executor.screenshot() as frame:
+                    before = thumbnail(frame)
+            start_time = time.perf_counter()
             if isinstance(action, Rail):
                 self.rail_controller.execute(action)
             elif isinstance(action, Action):
-                self.executor.execute(action, interval_ms)
+                # 有参考截图时等到界面识别为下一个场景，否则固定等待
+                self.executor.execute(action.expect(scene_reached(next_scene.name, fingerprints, interval_ms)), interval_ms)
             else:
                 raise ValueError("Invalid action type")
-            print(f"已到达：{next_scene.name}")
+            elapsed = time.perf_counter() - start_time
+            scene.Scene.graph().record(self._scene, next_scene, elapsed)
+            print(f"已到达：{next_scene.name}，用时 {elapsed:.1f} 秒")
             self._scene = next_scene
+            if before is not None:
+                # 收集参考截图，之后从任意界面启动都能识别
+                self.learn_scene(next_scene, before)
+
+    def learn_scene(self, next_scene: scene.Scene, before: np.ndarray) -> None:
+        """刚走过通往 next_scene 的连线后保存参考截图
+
+        固定等待后画面不一定已经切换，只在画面与动作前不同、且已经稳定时保存，
+        已经能按指纹识别为其他场景时不保存
+        """
+        with self.executor.screenshot() as frame:
+            matched = fingerprints.match(frame.image)
+            switched = changed(thumbnail(frame), before, 24, 0.05)
+        if matched is not None and matched[0] != next_scene.name:
+            return
+        if matched is None and not switched:
+            print(f"画面没有变化，不保存 {next_scene.name} 的参考截图")
+            return
+        if not self.executor.wait_until(ScreenSettled(min_ms=0).begin(self.executor.screenshot), 3):
+            return
+        with self.executor.screenshot() as frame:
+            if next_scene.name.endswith("主界面"):
+                # 主界面由 from_image 按站点名核对后保存
+                scene.Scene.from_image(frame)
+            else:
+                fingerprints.learn(next_scene.name, frame.image)
 
     def check_finished(self, 
                        determining_criterion: t.Tuple[Rect, str], 
@@ -73,12 +94,12 @@ class ResonanceHelper(ABC):
                        timeout_s: int=300
                        ) -> bool:
         start_time = time.time()
+        # 每隔几秒才检查一次，直接截图，不开启截图流
         while True:
             box, value = determining_criterion
-            image = Image.open(BytesIO(self.executor.screenshot()))
-            croped_image = image.crop(box)
-            text, _ = ocr.recognize(croped_image)
-            if text == value:
+            with self.executor.screenshot() as frame:
+                finished = has_label(frame.image, box, value)
+            if finished:
                 print("已完成")
                 # 检测到后停留一个interval_ms的时间，防止界面还未刷新
                 time.sleep(interval_ms / 1000)
@@ -105,37 +126,39 @@ class ExchangeHelper(ResonanceHelper):
             # 压价
             exchange_price_success_num = 0
             exchange_price_percent = 0.0
-            while exchange_price_success_num < exchange_price_num:
-                self.executor.execute(self._scene.exchange_price())
-
-                if self.is_first_exchange:
-                    sleep_time = 4
-                    self.is_first_exchange = False
-                else:
-                    sleep_time = 2
-                time.sleep(sleep_time)
-
-                current_exchange_price_percent, can_continue =  self._scene.get_exchange_price_info(self.executor.screenshot())                
-                if current_exchange_price_percent > exchange_price_percent:
-                    # 如果当前压价成功，则将成功次数加一，并更新压价百分比
-                    print(f"压价成功，当前压价百分比：{current_exchange_price_percent}")
-                    exchange_price_success_num += 1
-                    exchange_price_percent = current_exchange_price_percent
-                    continue
+            with self.executor.streaming():
+                while exchange_price_success_num < exchange_price_num:
+                    if self.is_first_exchange:
+                        sleep_time = 4
+                        self.is_first_exchange = False
+                    else:
+                        sleep_time = 2
+                    self.executor.execute(self._scene.exchange_price(sleep_time))
+                    if not self.executor.adaptive_wait:
+                        time.sleep(sleep_time)
+
+                    with self.executor.screenshot() as frame:
+                        current_exchange_price_percent, can_continue = self._scene.get_exchange_price_info(frame)
+                    if current_exchange_price_percent > exchange_price_percent:
+                        # 如果当前压价成功，则将成功次数加一，并更新压价百分比
+                        print(f"压价成功，当前压价百分比：{current_exchange_price_percent}")
+                        exchange_price_success_num += 1
+                        exchange_price_percent = current_exchange_price_percent
+                        continue
                 
-                if not can_continue:
-                    # 如果不能继续压价，则退出循环
-                    print("压价次数已达上限，退出压价")
-                    break
+                    if not can_continue:
+                        # 如果不能继续压价，则退出循环
+                        print("压价次数已达上限，退出压价")
+                        break
 
             # 使用道具
             for _ in range(extra):
                 self.executor.execute(self._scene.use_item("进货采买书"))
             
             while len(items) > 0:
-                self.executor.execute(
-                    self._scene.select_item(items, self.executor.screenshot())
-                )
+                with self.executor.screenshot() as frame:
+                    select_action = self._scene.select_item(items, frame)
+                self.executor.execute(select_action)
                 self.executor.execute(self._scene.next_page())
             
             action, next_scene = self._scene.buy()
@@ -153,28 +176,30 @@ class ExchangeHelper(ResonanceHelper):
             # 抬价
             exchange_price_success_num = 0
             exchange_price_percent = 0.0
-            while exchange_price_success_num < exchange_price_num:
-                self.executor.execute(self._scene.exchange_price())
-                
-                if self.is_first_exchange:
-                    sleep_time = 4
-                    self.is_first_exchange = False
-                else:
-                    sleep_time = 2
-                time.sleep(sleep_time)
+            with self.executor.streaming():
+                while exchange_price_success_num < exchange_price_num:
+                    if self.is_first_exchange:
+                        sleep_time = 4
+                        self.is_first_exchange = False
+                    else:
+                        sleep_time = 2
+                    self.executor.execute(self._scene.exchange_price(sleep_time))
+                    if not self.executor.adaptive_wait:
+                        time.sleep(sleep_time)
                 
-                current_exchange_price_percent, can_continue =  self._scene.get_exchange_price_info(self.executor.screenshot())
-                if current_exchange_price_percent > exchange_price_percent:
-                    # 如果当前抬价成功，则将成功次数加一，并更新抬价百分比
-                    print(f"抬价成功，当前抬价百分比：{current_exchange_price_percent}")
-                    exchange_price_success_num += 1
-                    exchange_price_percent = current_exchange_price_percent
-                    continue
+                    with self.executor.screenshot() as frame:
+                        current_exchange_price_percent, can_continue = self._scene.get_exchange_price_info(frame)
+                    if current_exchange_price_percent > exchange_price_percent:
+                        # 如果当前抬价成功，则将成功次数加一，并更新抬价百分比
+                        print(f"抬价成功，当前抬价百分比：{current_exchange_price_percent}")
+                        exchange_price_success_num += 1
+                        exchange_price_percent = current_exchange_price_percent
+                        continue
                 
-                if not can_continue:
-                    # 如果不能继续抬价，则退出循环
-                    print("抬价次数已达上限，退出抬价")
-                    break
+                    if not can_continue:
+                        # 如果不能继续抬价，则退出循环
+                        print("抬价次数已达上限，退出抬价")
+                        break
 
             self.executor.execute(self._scene.select_all())
             action, next_scene = self._scene.sell()
@@ -216,7 +241,8 @@ class ExchangeHelper(ResonanceHelper):
         except Exception:
             traceback.print_exc()
             self.callback()
-            self.executor.kill_client()
+            # 多台设备共用 adb server，出错时只关闭本设备的连接
+            self.executor.close_client()
 
 
 class ExpulsionHelper(ResonanceHelper):
@@ -292,7 +318,8 @@ class OrderHelper(ResonanceHelper):
             raise ValueError("当前不在订单界面")
         
         while True:
-            orders = self._scene.get_order_info(self.executor.screenshot())
+            with self.executor.screenshot() as frame:
+                orders = self._scene.get_order_info(frame)
             if len(orders) == 0:
                 print("没有可接取订单")
                 break
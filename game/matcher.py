@@ -0,0 +1,72 @@
+import typing as t
+from collections import defaultdict
+
+
+def levenshtein(a: str, b: str) -> int:
+    # 编辑距离，OCR 文字都很短，直接动态规划
+    if len(a) < len(b):
+        a, b = b, a
+    previous = list(range(len(b) + 1))
+    for i, char_a in enumerate(a, 1):
+        current = [i]
+        for j, char_b in enumerate(b, 1):
+            current.append(min(
+                previous[j] + 1,
+                current[j - 1] + 1,
+                previous[j - 1] + (char_a != char_b)
+            ))
+        previous = current
+    return previous[-1]
+
+
+def ngrams(text: str) -> t.Set[str]:
+    # 首尾加标记的二元组，单字文本也能建立索引
+    padded = f"^{text}$"
+    return {padded[i:i + 2] for i in range(len(padded) - 1)}
+
+
+class FuzzyIndex:
+    """OCR 文字到已知名称的模糊匹配
+
+    先用二元组倒排索引找出少量候选，再按编辑距离打分，
+    分数为 1 - 编辑距离 / 较长文本长度
+    """
+    def __init__(self, words: t.Iterable[str], max_candidates: int = 8) -> None:
+        self.words = list(dict.fromkeys(words))
+        self.max_candidates = max_candidates
+        self._index: t.Dict[str, t.List[int]] = defaultdict(list)
+        for i, word in enumerate(self.words):
+            for gram in ngrams(word):
+                self._index[gram].append(i)
+
+    def candidates(self, text: str) -> t.List[str]:
+        counts: t.Dict[int, int] = defaultdict(int)
+        for gram in ngrams(text):
+            for i in self._index.get(gram, ()):
+                counts[i] += 1
+        best = sorted(counts, key=counts.__getitem__, reverse=True)[:self.max_candidates]
+        return [self.words[i] for i in best]
+
+    def match(self, text: str, min_score: float = 0.5) -> t.Optional[t.Tuple[str, float]]:
+        """返回分数最高的名称和分数
+
+        低于 min_score，或有多个名称同分无法区分时返回 None
+        """
+        text = text.strip()
+        if not text:
+            return None
+        scored: t.List[t.Tuple[float, str]] = []
+        for word in self.candidates(text):
+            if word == text:
+                return word, 1.0
+            scored.append((1 - levenshtein(text, word) / max(len(text), len(word)), word))
+        scored.sort(reverse=True)
+        if not scored or scored[0][0] < min_score:
+            return None
+        if len(scored) > 1 and scored[1][0] == scored[0][0]:
+            return None
+        return scored[0][1], scored[0][0]
+
+    def lookup(self, text: str, min_score: float = 0.5) -> t.Optional[str]:
+        matched = self.match(text, min_score)
+        return matched[0] if matched is not None else None
@@ -143,6 +143,9 @@ exchange_item_rect = (978, 227, 1263, 1025)
 # 到站检测RECT
 arrival_rect = (1262, 514, 1414, 559)
 
+# 本地物品警告提示框RECT，包含"今日不再提示"和确认按钮
+local_item_warning_rect = (480, 300, 1500, 800)
+
 # 抬价/砍价百分比RECT
 exchange_price_percent_rect = (1488, 678, 1582, 711)
 
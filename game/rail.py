@@ -2,9 +2,13 @@ from enum import Enum
 from .executor import Executor
 from .action import Action, action
 from . import position
-from io import BytesIO
-from PIL import Image
 from ocr import ocr
+from .template import has_label
+from .fingerprint import fingerprints
+from .wait import scene_reached
+from .atlas import MapAtlas
+from .matcher import FuzzyIndex
+import threading
 import time
 
 import typing as t
@@ -26,8 +30,15 @@ class Site(Enum):
         for site in Site:
             if site.value == name:
                 return site
+        # OCR 识别出的站点名可能有个别错字
+        matched = SITE_INDEX.lookup(name)
+        if matched is not None:
+            return Site(matched)
         raise ValueError("Invalid site name")
 
+
+SITE_INDEX = FuzzyIndex(site.value for site in Site)
+
 class Rail:
     def __init__(self, src: Site, dst: Site) -> None:
         self.src = src
@@ -35,6 +46,13 @@ class Rail:
 
 
 class RailController:
+    # 世界地图拼接图，多开时共用
+    atlas = MapAtlas()
+    # 多开时只由一台设备扫描地图
+    survey_lock = threading.Lock()
+    # 本次运行已经扫描过，没有记录到站点时不再重复扫描，直接逐屏查找
+    surveyed = False
+
     def __init__(self, executor: Executor) -> None:
         self.executor = executor
 
@@ -49,32 +67,90 @@ class RailController:
         self.executor.execute(action().tap(*dst_position))
         self.executor.execute(action().tap(*position.rail))
         self.wait_for_arrival(5)
-        self.executor.execute(action().tap(*position.arrival), 5000)
+        arrival = action().tap(*position.arrival).expect(scene_reached(f"{rail.dst.value}主界面", fingerprints, 5000))
+        self.executor.execute(arrival, 5000)
 
 
     def wait_for_arrival(self, interval_s: int) -> None:
         print("等待到达站点...")
+        # 每隔几秒才检查一次，直接截图，不开启截图流
         while True:
-            image = Image.open(BytesIO(self.executor.screenshot()))
-            croped_image = image.crop(position.arrival_rect)
-            result, _ = ocr.recognize(croped_image)
-            if result == "进入站点":
+            with self.executor.screenshot() as frame:
+                arrived = has_label(frame.image, position.arrival_rect, "进入站点")
+            if arrived:
                 break
             time.sleep(interval_s)
 
         
 
     def detect_destination(self, rail: Rail) -> t.Optional[t.Tuple[int, int]]:
-        self.swipe_to_top_left()
-        
-        position = self.detect(rail)
+        if not RailController.atlas.ready and not RailController.surveyed:
+            with RailController.survey_lock:
+                # 等待锁期间其他设备可能已经扫描完成
+                if not RailController.atlas.ready and not RailController.surveyed:
+                    # 第一次乘车时逐屏扫描并拼接地图
+                    self.survey()
+        position = self.seek(rail)
         if position is not None:
-            # 如果在第一屏就找到了，直接返回
             return position
-        
-        # 拖动顺序
+        # 按地图定位失败时逐屏查找
+        return self.scan(rail)
+
+    def seek(self, rail: Rail) -> t.Optional[t.Tuple[int, int]]:
+        """由当前画面在地图上定位，直接拖动到目的地附近，再识别一个区域确认"""
+        atlas = RailController.atlas
+        with self.executor.screenshot() as frame:
+            viewport = atlas.locate(frame.image)
+        if viewport is None or rail.dst.value not in atlas.sites:
+            return None
+        swipes = atlas.plan(viewport, rail.dst.value)
+        if swipes:
+            action_chain = action()
+            for swipe in swipes:
+                action_chain.swipe(*swipe)
+            self.executor.execute(action_chain, 500)
+            frame = self.executor.screenshot()
+            viewport = atlas.locate(frame.image)
+        else:
+            frame = self.executor.screenshot()
+        with frame:
+            if viewport is None:
+                return None
+            x, y = atlas.screen_position(viewport, rail.dst.value)
+            rect = (max(x - 160, 0), max(y - 36, 0), min(x + 160, frame.width), min(y + 36, frame.height))
+            if rect[0] >= rect[2] or rect[1] >= rect[3]:
+                return None
+            text, _ = ocr.recognize(frame.crop(rect))
+        if SITE_INDEX.lookup(text) != rail.dst.value:
+            return None
+        return x, y
+
+    def survey(self) -> None:
+        """按 scan 的顺序逐屏截图，拼接地图并记录各站点的坐标"""
+        print("正在扫描世界地图...")
+        atlas = RailController.atlas
+        atlas.begin_survey()
+        self.swipe_to_top_left()
+        self._survey_screen()
+        for swipe in self.swipe_order():
+            self._survey_screen(swipe())
+        atlas.finish_survey()
+        RailController.surveyed = True
+        print(f"地图扫描完成，共记录 {len(atlas.sites)} 个站点")
+
+    def _survey_screen(self, drag: t.Tuple[int, int] = (0, 0)) -> None:
+        # 识别当前屏的站点并加入拼接图
+        with self.executor.screenshot() as frame:
+            labels = []
+            for x, y, name, _ in ocr.detect(frame.image):
+                site_name = SITE_INDEX.lookup(name)
+                if site_name is not None:
+                    labels.append((x, y, site_name))
+            RailController.atlas.add_screen(frame.image, drag, labels)
+
+    def swipe_order(self) -> t.List[t.Callable[[], t.Tuple[int, int]]]:
         # 目前需要检测上下三屏，左右两屏
-        swipe_order = [
+        return [
             self.swipe_to_right, 
             self.swipe_to_right, 
             self.swipe_to_bottom, 
@@ -86,7 +162,16 @@ class RailController:
             self.swipe_to_right,
             self.swipe_to_right
         ]
-        for swipe in swipe_order:
+
+    def scan(self, rail: Rail) -> t.Optional[t.Tuple[int, int]]:
+        self.swipe_to_top_left()
+        
+        position = self.detect(rail)
+        if position is not None:
+            # 如果在第一屏就找到了，直接返回
+            return position
+        
+        for swipe in self.swipe_order():
             if position is not None:
                 return position
             swipe()
@@ -95,10 +180,10 @@ class RailController:
 
 
     def detect(self, rail: Rail) -> t.Optional[t.Tuple[int, int]]:
-        image = Image.open(BytesIO(self.executor.screenshot()))
-        detect_result = ocr.detect(image)
+        with self.executor.screenshot() as frame:
+            detect_result = ocr.detect(frame.image)
         for x, y, name, _ in detect_result:
-            if name == rail.dst.value:
+            if SITE_INDEX.lookup(name) == rail.dst.value:
                 return x, y
         return None
 
@@ -110,29 +195,33 @@ class RailController:
             self.swipe_to_top()
             self.swipe_to_left()
 
-    def swipe_to_left(self) -> None:
+    def swipe_to_left(self) -> t.Tuple[int, int]:
         # 滑动到左边，实际是向右滑动
         pos_src = int(1920 / 4), int(1080 / 2)
         pos_dst = int(1920 / 4 * 3), int(1080 / 2)
         self.executor.execute(action().swipe(*pos_src, *pos_dst), 500)
+        return pos_dst[0] - pos_src[0], pos_dst[1] - pos_src[1]
 
-    def swipe_to_right(self) -> None:
+    def swipe_to_right(self) -> t.Tuple[int, int]:
         # 滑动到右边，实际是向左滑动
         pos_src = int(1920 / 4 * 3), int(1080 / 2)
         pos_dst = int(1920 / 4), int(1080 / 2)
         self.executor.execute(action().swipe(*pos_src, *pos_dst), 500)
+        return pos_dst[0] - pos_src[0], pos_dst[1] - pos_src[1]
 
-    def swipe_to_top(self) -> None:
+    def swipe_to_top(self) -> t.Tuple[int, int]:
         # 滑动到上边，实际是向下滑动
         pos_src = int(1920 / 2), int(1080 / 4)
         pos_dst = int(1920 / 2), int(1080 / 4 * 3)
         self.executor.execute(action().swipe(*pos_src, *pos_dst), 500)
+        return pos_dst[0] - pos_src[0], pos_dst[1] - pos_src[1]
 
-    def swipe_to_bottom(self) -> None:
+    def swipe_to_bottom(self) -> t.Tuple[int, int]:
         # 滑动到下边，实际是向上滑动
         pos_src = int(1920 / 2), int(1080 / 4 * 3)
         pos_dst = int(1920 / 2), int(1080 / 4)
         self.executor.execute(action().swipe(*pos_src, *pos_dst), 500)
+        return pos_dst[0] - pos_src[0], pos_dst[1] - pos_src[1]
 
 
 
@@ -1,11 +1,16 @@
 import typing as t
+import os
 from .action import Action, action, escape, enter_urban
 from . import position
 from .rail import Site, Rail
-from io import BytesIO
-from PIL import Image
+from emulator.frame import Frame
 from ocr import ocr
-import numpy as np
+from .template import has_label
+from .graph import SceneGraph, EdgeCosts
+from . import fingerprint
+from .wait import RegionChanged, ScreenSettled
+from .goods import GOODS_INDEX
+from PIL import Image
 
 from .data_types import *
 
@@ -13,6 +18,12 @@ from .data_types import *
 
 class Scene:
     scene_list: t.List['Scene'] = []
+    # 场景图索引，首次使用时建立，增加场景或连线后重建
+    _graph: t.Optional[SceneGraph] = None
+    # 每一步的实测耗时，用于选择最快的路径
+    edge_costs = EdgeCosts(os.path.join(os.getcwd(), "data", "edge_costs.json"))
+    # 整屏识别场景，参考截图在运行中自动收集
+    fingerprints = fingerprint.fingerprints
 
     def __init__(self, 
                  name: str, 
@@ -22,33 +33,48 @@ class Scene:
         self._next_scenes: t.Dict[Scene, t.Union[Action, Rail]]  = {}
         self.site: Site = site
         Scene.scene_list.append(self)
+        Scene._graph = None
     
     def add_next_scene(self, scene: 'Scene', action: t.Union[Action, Rail]) -> None:
         self._next_scenes[scene] = action
+        Scene._graph = None
+
+    @classmethod
+    def graph(cls) -> SceneGraph:
+        if Scene._graph is None:
+            Scene._graph = SceneGraph(Scene.scene_list, Scene.edge_costs)
+        return Scene._graph
     
     def goto(self, scene_name: str) -> t.Tuple['Scene', t.Union[Action, Rail]]:
-        for scene, action in self._next_scenes.items():
-            if scene.name == scene_name:
-                return scene, action
-        raise ValueError(f"Scene {scene_name} not found")
+        return Scene.graph().edge(self, scene_name)
+
+    def route(self, scene_name: str) -> t.List['Scene']:
+        return Scene.graph().route(self, scene_name)
     
     @classmethod
-    def from_image(cls, image_bytes: bytes) -> t.Optional['Scene']:
-        image = Image.open(BytesIO(image_bytes))
+    def from_image(cls, frame: Frame) -> t.Optional['Scene']:
+        image = frame.image
+        # 先按整屏指纹识别，任何界面都可以识别
+        matched = Scene.fingerprints.match(image)
+        if matched is not None and not matched[0].endswith("主界面"):
+            return cls.from_name(matched[0])
+
+        # 各站点主界面的布局相同，只有一个站点有参考截图时其他站点也会匹配到它，
+        # 所以主界面总是按站点名核对，没有参考截图时也只能这样识别
         croped_image = image.crop(position.station_name_rect)
-        text, _ = ocr.recognize(croped_image)
-        text = f"{text}主界面"
-        for scene in cls.scene_list:
-            if text == scene.name:
-                return scene
-        return None
+        text, _ = ocr.recognize(croped_image, roi="station_name_rect")
+        # 允许站点名有个别错字
+        name = Scene.graph().name_index.lookup(f"{text}主界面", min_score=0.7)
+        if name is None:
+            return cls.from_name(matched[0]) if matched is not None else None
+        if Scene.fingerprints.needs(name):
+            # 站点名已经确认，指纹误判为其他站点时也要保存
+            Scene.fingerprints.learn(name, image, force=True)
+        return cls.from_name(name)
     
     @classmethod
     def from_name(cls, name: str) -> t.Optional['Scene']:
-        for scene in cls.scene_list:
-            if name == scene.name:
-                return scene
-        return None
+        return Scene.graph().scene(name)
 
 
     
@@ -71,14 +97,15 @@ class ExpulsionTaskScene(Scene):
         print(f"选择驱逐任务{task_index}")
         return action().tap(*getattr(position, f"expulsion_task_choose_{task_index}"))
     
-    def get_progress(self, image_bytes: bytes) -> ExpulsionProgresses:
-        image = Image.open(BytesIO(image_bytes))
+    def get_progress(self, frame: Frame) -> ExpulsionProgresses:
+        image = frame.image
         croped_image_1 = image.crop(position.expulsion_task_1_progress_rect)
         croped_image_2 = image.crop(position.expulsion_task_2_progress_rect)
         croped_image_3 = image.crop(position.expulsion_task_3_progress_rect)
-        progress_1, _ = ocr.recognize(croped_image_1)
-        progress_2, _ = ocr.recognize(croped_image_2)
-        progress_3, _ = ocr.recognize(croped_image_3)
+        # 三个进度一次批量识别
+        (progress_1, _), (progress_2, _), (progress_3, _) = ocr.recognize_batch(
+            [croped_image_1, croped_image_2, croped_image_3]
+        )
         return int(progress_1), int(progress_2), int(progress_3)
     
     def start(self) -> Action:
@@ -86,8 +113,11 @@ class ExpulsionTaskScene(Scene):
        
 
 class ExchangeScene(Scene):
-    def exchange_price(self) -> Action:
-        return action().tap(*position.exchange_price)
+    def exchange_price(self, timeout_s: float = 2.0) -> Action:
+        # 砍价/抬价结果出现后百分比会变化，失败时最多等待 timeout_s
+        rect = position.exchange_price_percent_rect
+        condition = RegionChanged(rect, timeout_s=timeout_s).then(ScreenSettled(rect, min_ms=0, timeout_s=1.0))
+        return action().tap(*position.exchange_price).expect(condition)
     
     def select_all(self) -> Action:
         return action().tap(*position.select_all)
@@ -106,45 +136,29 @@ class ExchangeBuyScene(ExchangeScene):
                  ) -> None:
         super().__init__(name, site)
 
-    def select_item(self, item_list: t.List[str], image_bytes: bytes) -> Action:
-        image = Image.open(BytesIO(image_bytes))
-        croped_image = image.crop(position.exchange_item_rect)
-        croped_image = np.array(croped_image)
-        ocr_result = ocr.detect(croped_image)
+    def select_item(self, item_list: t.List[str], frame: Frame) -> Action:
+        ocr_result = ocr.detect(frame.image, rect=position.exchange_item_rect)
         # 初始化动作链
         action_chain = action()
-        for x, y, name, _ in ocr_result:
-            # 转换局部坐标为全局坐标
-            x += position.exchange_item_rect[0]
-            y += position.exchange_item_rect[1]
+        for x, y, text, _ in ocr_result:
+            name = GOODS_INDEX.lookup(text)
             # 如果商品名称在列表中，则点击
             if name in item_list:
                 action_chain = action_chain.tap(x, y)
                 item_list.remove(name)
         return action_chain
 
-    def get_exchange_price_info(self, image_bytes: bytes) -> t.Tuple[float, bool]:
-        image = Image.open(BytesIO(image_bytes))
-        croped_image = image.crop(position.exchange_price_percent_rect)
-        result = ocr.recognize(croped_image)
-        price_percent =  float(result[0].replace("%", "").strip())
+    def get_exchange_price_info(self, frame: Frame) -> t.Tuple[float, bool]:
+        image = frame.image
+        percent_text, _ = ocr.recognize(image.crop(position.exchange_price_percent_rect))
+        price_percent =  float(percent_text.replace("%", "").strip())
 
-        croped_image = image.crop(position.exchange_price_text_rect)
-        result = ocr.recognize(croped_image)
-        if result[0] == "砍价":
+        if has_label(image, position.exchange_price_text_rect, "砍价"):
             return price_percent, True
         return price_percent, False
     
     def buy(self) -> t.Tuple[Action, Scene]:
-        next_scene_name = self.name.replace("购买", "")
-        next_scene = None
-
-        for scene in self._next_scenes.keys():
-            if scene.name == next_scene_name:
-                next_scene = scene
-        
-        if next_scene is None:
-            raise ValueError(f"Scene {next_scene_name} not found")
+        next_scene, _ = self.goto(self.name.replace("购买", ""))
         
         # 交易行情变动时，需要按两次购买
         action_chain = action().tap(*position.confirm_buy_or_sell).tap(*position.confirm_buy_or_sell)
@@ -175,44 +189,32 @@ class ExchangeSellScene(ExchangeScene):
             action_chain = action_chain.tap(*position.sell_select)
         return action_chain
     
-    def check_empty(self, image_bytes: bytes) -> bool:
-        image = Image.open(BytesIO(image_bytes))
-        croped_image = image.crop(position.exchange_item_rect)
-        result = ocr.detect(croped_image)
+    def check_empty(self, frame: Frame) -> bool:
+        result = ocr.detect(frame.image, rect=position.exchange_item_rect)
         if len(result) == 0:
             return True
         return False
     
-    def get_exchange_price_info(self, image_bytes: bytes) -> t.Tuple[float, bool]:
-        image = Image.open(BytesIO(image_bytes))
-        croped_image = image.crop(position.exchange_price_percent_rect)
-        result = ocr.recognize(croped_image)
-        price_percent =  float(result[0].replace("%", "").strip())
-
-        croped_image = image.crop(position.exchange_price_text_rect)
-        result = ocr.recognize(croped_image)
-        if result[0] == "抬价":
+    def get_exchange_price_info(self, frame: Frame) -> t.Tuple[float, bool]:
+        image = frame.image
+        percent_text, _ = ocr.recognize(image.crop(position.exchange_price_percent_rect))
+        price_percent =  float(percent_text.replace("%", "").strip())
+
+        if has_label(image, position.exchange_price_text_rect, "抬价"):
             return price_percent, True
         return price_percent, False
         
     def sell(self) -> t.Tuple[Action, Scene]:
-        next_scene_name = self.name.replace("售出", "")
-        next_scene = None
-
-        for scene in self._next_scenes.keys():
-            if scene.name == next_scene_name:
-                next_scene = scene
-        
-        if next_scene is None:
-            raise ValueError(f"Scene {next_scene_name} not found")
+        next_scene, _ = self.goto(self.name.replace("售出", ""))
         
         # 交易行情变动时，需要按两次卖出
         action_chain = action().tap(*position.confirm_buy_or_sell).tap(*position.confirm_buy_or_sell)
         
         return action_chain, next_scene
     
-    def check_local_item_warning(self, image_bytes: bytes) -> bool:
-        result = ocr.detect(Image.open(BytesIO(image_bytes)))
+    def check_local_item_warning(self, frame: Frame) -> bool:
+        # 只检测提示框所在的区域
+        result = ocr.detect(frame.image, rect=position.local_item_warning_rect)
         for _, _, name, _ in result:
             if name == "今日不再提示":
                 return True
@@ -227,28 +229,28 @@ class ColumbaScene(Scene):
 
 
 class ColumbaOrderScene(Scene):
-    def get_order_info(self, image_bytes: bytes) -> t.List[OrderInfo]:
+    def get_order_info(self, frame: Frame) -> t.List[OrderInfo]:
         order_result: t.List[OrderInfo] = []
-        image = Image.open(BytesIO(image_bytes))
-        croped_image = image.crop(position.order_info_rect)
-        result = ocr.detect(croped_image)
+        image = frame.image
+        result = ocr.detect(image, rect=position.order_info_rect)
+        button_positions: t.List[Position] = []
+        crops: t.List[Image.Image] = []
         for item in result:
             # 只看未接取的订单
             x, y, name, _ = item
 
-            button_position = (x + position.order_info_rect[0], y + position.order_info_rect[1])
-
             if "接取订单" not in name:
                 continue
 
+            button_positions.append((x, y))
+
             dst_info_rect = (
                 x + position.order_destination_rect_offset[0], 
                 y + position.order_destination_rect_offset[1],
                 x + position.order_destination_rect_offset[2],
                 y + position.order_destination_rect_offset[3]
             )
-            dst_croped_image = croped_image.crop(dst_info_rect)
-            dst_name, _ = ocr.recognize(dst_croped_image)
+            crops.append(image.crop(dst_info_rect))
 
             occupy_info_rect = (
                 x + position.order_occupy_rect_offset[0], 
@@ -256,8 +258,11 @@ class ColumbaOrderScene(Scene):
                 x + position.order_occupy_rect_offset[2],
                 y + position.order_occupy_rect_offset[3]
             )
-            occupy_croped_image = croped_image.crop(occupy_info_rect)
-            occupy_str, _ = ocr.recognize(occupy_croped_image)
+            crops.append(image.crop(occupy_info_rect))
+
+        # 所有订单的目的地和占用信息一次批量识别
+        texts = [text for text, _ in ocr.recognize_batch(crops)]
+        for button_position, dst_name, occupy_str in zip(button_positions, texts[0::2], texts[1::2]):
             print(occupy_str)
             if "座位" in occupy_str:
                 order_type = "客运"
@@ -546,5 +551,5 @@ for columba_scene in columba_scenes:
 if __name__ == '__main__':
     from emulator.adb import ADBClient
     adb = ADBClient()
-    scene = Scene.from_image(adb.screenshot())
+    scene = Scene.from_image(adb.capture())
     print(scene.name)
@@ -0,0 +1,122 @@
+import typing as t
+import os
+import threading
+from PIL import Image
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+from ocr import ocr
+
+from .data_types import *
+
+
+def ncc(image: np.ndarray, template: np.ndarray) -> float:
+    """零均值归一化互相关，结果在 -1 到 1 之间，对亮度和对比度变化不敏感
+
+    image 比模板大时在所有偏移位置上匹配，返回最高分
+    """
+    windows = sliding_window_view(image, template.shape)
+    a = windows - windows.mean(axis=(-2, -1), keepdims=True)
+    b = template - template.mean()
+    b_energy = (b * b).sum()
+    if b_energy == 0:
+        # 纯色模板只比较亮度
+        return 1.0 if np.abs(windows.mean(axis=(-2, -1)) - template.mean()).min() < 8 else 0.0
+    numerator = (a * b).sum(axis=(-2, -1))
+    denominator = np.sqrt((a * a).sum(axis=(-2, -1)) * b_energy)
+    scores = np.divide(numerator, denominator, out=np.zeros_like(numerator), where=denominator > 0)
+    return float(scores.max())
+
+
+class TemplateLibrary:
+    """固定位置文字的模板库
+
+    模板在运行时由 OCR 确认后从截图中截取，保存在 data/templates/<文字>/ 下
+    """
+    def __init__(self,
+                 directory: t.Optional[str] = None,
+                 accept: float = 0.9,
+                 reject: float = 0.5,
+                 max_templates: int = 4) -> None:
+        self.directory = directory or os.path.join(os.getcwd(), "data", "templates")
+        # 高于 accept 认为匹配，低于 reject 认为不匹配，中间交给 OCR
+        self.accept = accept
+        self.reject = reject
+        self.max_templates = max_templates
+        self._templates: t.Dict[str, t.List[np.ndarray]] = {}
+        self._lock = threading.Lock()
+
+    def _load(self, label: str) -> t.List[np.ndarray]:
+        if label not in self._templates:
+            templates = []
+            label_dir = os.path.join(self.directory, label)
+            if os.path.isdir(label_dir):
+                for name in sorted(os.listdir(label_dir)):
+                    image = Image.open(os.path.join(label_dir, name)).convert("L")
+                    templates.append(np.asarray(image, dtype=np.float32))
+            self._templates[label] = templates
+        return self._templates[label]
+
+    def score(self, label: str, image: Image.Image) -> t.Optional[float]:
+        # 与该文字所有模板的最高相关系数，没有能放入该区域的模板时返回 None
+        gray = np.asarray(image.convert("L"), dtype=np.float32)
+        with self._lock:
+            templates = [
+                template for template in self._load(label)
+                if template.shape[0] <= gray.shape[0] and template.shape[1] <= gray.shape[1]
+            ]
+        if not templates:
+            return None
+        # 先只比较区域正中的位置，界面没有偏移时无需搜索
+        best = -1.0
+        for template in templates:
+            dy = (gray.shape[0] - template.shape[0]) // 2
+            dx = (gray.shape[1] - template.shape[1]) // 2
+            centre = gray[dy:dy + template.shape[0], dx:dx + template.shape[1]]
+            best = max(best, ncc(centre, template))
+            if best >= self.accept:
+                return best
+        return max(ncc(gray, template) for template in templates)
+
+    def match(self, label: str, image: Image.Image) -> t.Optional[bool]:
+        score = self.score(label, image)
+        if score is None or self.reject < score < self.accept:
+            return None
+        return score >= self.accept
+
+    def add(self, label: str, image: Image.Image) -> None:
+        with self._lock:
+            templates = self._load(label)
+            if len(templates) >= self.max_templates:
+                return
+            gray = image.convert("L")
+            label_dir = os.path.join(self.directory, label)
+            os.makedirs(label_dir, exist_ok=True)
+            gray.save(os.path.join(label_dir, f"{len(templates)}.png"))
+            templates.append(np.asarray(gray, dtype=np.float32))
+
+
+templates = TemplateLibrary()
+
+
+def has_label(image: Image.Image, rect: Rect, label: str, margin: int = 2) -> bool:
+    """判断固定区域中是否为指定文字，模板无法确定时使用 OCR
+
+    模板匹配时区域向四周扩大 margin 像素，容忍界面的轻微偏移
+    """
+    x1, y1, x2, y2 = rect
+    search_rect = (
+        max(x1 - margin, 0),
+        max(y1 - margin, 0),
+        min(x2 + margin, image.width),
+        min(y2 + margin, image.height)
+    )
+    matched = templates.match(label, image.crop(search_rect))
+    if matched is not None:
+        return matched
+    croped_image = image.crop(rect)
+    text, _ = ocr.recognize(croped_image, roi=str(rect))
+    if text == label:
+        # OCR 确认后截取为模板，之后不再需要 OCR
+        templates.add(label, croped_image)
+        return True
+    return False
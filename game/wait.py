@@ -0,0 +1,141 @@
+import typing as t
+import time
+from abc import ABC, abstractmethod
+import numpy as np
+from PIL import Image
+from emulator.frame import Frame
+
+from .data_types import *
+
+# 轮询时比较的缩略图大小
+THUMBNAIL_SIZE = (64, 36)
+
+# 返回当前帧的函数，以及由它构造的检查函数
+Capture = t.Callable[[], Frame]
+Check = t.Callable[[Frame], bool]
+
+
+def thumbnail(frame: Frame, rect: t.Optional[Rect] = None) -> np.ndarray:
+    image = frame.image
+    if rect is not None:
+        image = image.crop(rect)
+    image = image.convert("L")
+    size = (min(THUMBNAIL_SIZE[0], image.width), min(THUMBNAIL_SIZE[1], image.height))
+    return np.asarray(image.resize(size, Image.BOX), dtype=np.int16)
+
+
+def changed(current: np.ndarray, last: np.ndarray, threshold: int, fraction: float) -> bool:
+    # 灰度差超过 threshold 的像素占比超过 fraction 才算变化，个别像素的闪烁和噪点不计
+    return float((np.abs(current - last) > threshold).mean()) > fraction
+
+
+class Condition(ABC):
+    """动作执行后期望的界面状态
+
+    条件对象本身不保存状态，可以挂在共用的动作上，
+    每次等待时由 begin 生成一个新的检查函数，begin 在动作执行前调用，可以截取动作前的帧作为参照
+    """
+    def __init__(self, timeout_s: float = 10.0) -> None:
+        self.timeout_s = timeout_s
+
+    @abstractmethod
+    def begin(self, capture: Capture) -> Check:
+        pass
+
+    def then(self, other: 'Condition') -> 'Condition':
+        return Then(self, other)
+
+
+class ScreenSettled(Condition):
+    """画面 (或 rect 区域) 连续 stable_ms 没有变化，至少等待 min_ms 让界面开始响应"""
+    def __init__(self,
+                 rect: t.Optional[Rect] = None,
+                 min_ms: int = 300,
+                 stable_ms: int = 300,
+                 threshold: int = 12,
+                 fraction: float = 0.01,
+                 timeout_s: float = 10.0) -> None:
+        super().__init__(timeout_s)
+        self.rect = rect
+        self.min_ms = min_ms
+        self.stable_ms = stable_ms
+        self.threshold = threshold
+        self.fraction = fraction
+
+    def begin(self, capture: Capture) -> Check:
+        started_at = time.time()
+        last: t.Optional[np.ndarray] = None
+        stable_since = started_at
+
+        def check(frame: Frame) -> bool:
+            nonlocal last, stable_since
+            now = time.time()
+            current = thumbnail(frame, self.rect)
+            if last is None or changed(current, last, self.threshold, self.fraction):
+                stable_since = now
+            last = current
+            return now - started_at >= self.min_ms / 1000 and now - stable_since >= self.stable_ms / 1000
+        return check
+
+
+class RegionChanged(Condition):
+    """rect 区域与动作前相比发生变化"""
+    def __init__(self, rect: Rect, threshold: int = 24, fraction: float = 0.05, timeout_s: float = 10.0) -> None:
+        super().__init__(timeout_s)
+        self.rect = rect
+        self.threshold = threshold
+        self.fraction = fraction
+
+    def begin(self, capture: Capture) -> Check:
+        with capture() as frame:
+            before = thumbnail(frame, self.rect)
+
+        def check(frame: Frame) -> bool:
+            return changed(thumbnail(frame, self.rect), before, self.threshold, self.fraction)
+        return check
+
+
+class SceneReached(Condition):
+    """整屏指纹识别为 scene_name"""
+    def __init__(self, scene_name: str, fingerprints: t.Any, timeout_s: float = 15.0) -> None:
+        super().__init__(timeout_s)
+        self.scene_name = scene_name
+        self.fingerprints = fingerprints
+
+    def begin(self, capture: Capture) -> Check:
+        def check(frame: Frame) -> bool:
+            # 目标已知，只要求最近的场景是它，与相似场景区分不开时也能结束等待
+            nearest = self.fingerprints.nearest(frame.image)
+            return nearest is not None and nearest[0] == self.scene_name
+        return check
+
+
+def scene_reached(scene_name: str, fingerprints: t.Any, fixed_ms: int) -> t.Optional[Condition]:
+    """代替 fixed_ms 的固定等待，识别不出目标场景时最多等待固定时间的两倍"""
+    # 该场景还没有参考截图时无法判断，返回 None 使用固定的等待时间
+    if fingerprints.captures(scene_name) == 0:
+        return None
+    timeout_s = fixed_ms / 1000
+    return SceneReached(scene_name, fingerprints, timeout_s).then(ScreenSettled(min_ms=0, timeout_s=timeout_s))
+
+
+class Then(Condition):
+    """先满足 first，再满足 second"""
+    def __init__(self, first: Condition, second: Condition) -> None:
+        super().__init__(first.timeout_s + second.timeout_s)
+        self.first = first
+        self.second = second
+
+    def begin(self, capture: Capture) -> Check:
+        first = self.first.begin(capture)
+        second: t.Optional[Check] = None
+
+        def check(frame: Frame) -> bool:
+            nonlocal second
+            if second is None:
+                if not first(frame):
+                    return False
+                # second 从 first 满足时开始计时
+                second = self.second.begin(lambda: frame)
+            return second(frame)
+        return check
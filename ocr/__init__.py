@@ -1,3 +1,37 @@
-from .ocr_paddle import OCR
+import configparser
+import os
+from .base import create_backend
+from .profile import OCRProfile
+from .pool import OCRPool
+from .cache import OCRCache
+from .gate import OCRGate
+from .metrics import OCRMetrics, SampleWriter
 
-ocr = OCR()
\ No newline at end of file
+# 解析配置文件
+config = configparser.ConfigParser()
+config.read(os.path.join(os.getcwd(), "ocr.ini"))
+
+# 识别后端: paddle 或 onnx
+backend = config.get("OCR", "backend", fallback="paddle")
+
+# 工作进程数为 0 时在当前进程中识别
+workers = config.getint("OCR", "workers", fallback=0)
+# 推理参数，python -m ocr.autotune 的结果优先
+profile = OCRProfile.load()
+ocr = OCRPool(workers, backend, profile) if workers > 0 else create_backend(backend, profile)
+
+# 缓存条目数为 0 时不缓存识别结果
+cache_size = config.getint("OCR", "cache_size", fallback=0)
+if cache_size > 0:
+    ocr = OCRCache(ocr, cache_size)
+
+# 区域变化阈值为 0 时不跳过识别
+change_threshold = config.getint("OCR", "change_threshold", fallback=0)
+if change_threshold > 0:
+    ocr = OCRGate(ocr, change_threshold)
+
+# 记录各调用位置的耗时和置信度，低置信度的截图保存为样本
+if config.getboolean("OCR", "metrics", fallback=False):
+    max_samples = config.getint("OCR", "max_samples", fallback=200)
+    writer = SampleWriter(os.path.join(os.getcwd(), "data", "ocr_samples"), max_samples) if max_samples > 0 else None
+    ocr = OCRMetrics(ocr, sample_confidence=config.getfloat("OCR", "sample_confidence", fallback=0.8), writer=writer)
\ No newline at end of file
@@ -0,0 +1,154 @@
+"""OCR 推理参数自动调优
+
+在录制的样本上逐项尝试推理参数，保留满足准确率下限的最快组合，保存到 data/ocr_profile.ini
+
+样本目录的格式与 benchmark.ocr_backends 相同，放置截取的区域图片和 labels.txt，
+每行为 "文件名<TAB>正确文字"，metrics 保存的 data/ocr_samples/<调用位置> 校对后可直接使用
+如果样本目录下有 frames 子目录，其中放置整张截图，labels.txt 每行为 "文件名<TAB>文字1<TAB>文字2..."，
+会同时计算检测的耗时，检测到全部文字才算正确，det_limit_side_len 只影响这一部分
+
+每组参数在单独的进程中加载和测量，准确率下限默认为当前参数的准确率
+
+用法: python -m ocr.autotune <样本目录> [准确率下限]
+"""
+import configparser
+import multiprocessing
+import os
+import sys
+import time
+import typing as t
+from PIL import Image
+from .profile import OCRProfile, TUNED_PROFILE_PATH
+
+ROUNDS = 3
+
+
+def search_space(backend_name: str, workers: int) -> t.Dict[str, t.List[t.Any]]:
+    # 多个工作进程同时识别时，每个进程的线程数不应超过平均分到的核数
+    max_threads = max((os.cpu_count() or 1) // max(workers, 1), 1)
+    threads = sorted({n for n in (1, 2, 4, 8, 16) if n <= max_threads} | {max_threads})
+    space = {
+        "use_angle_cls": [False, True],
+        "enable_mkldnn": [True, False],
+        "cpu_threads": threads,
+        "rec_batch_num": [1, 6, 12, 24],
+        "det_limit_side_len": [480, 640, 736, 960],
+    }
+    if backend_name == "onnx":
+        # onnx 后端没有方向分类和 MKL-DNN 开关
+        del space["use_angle_cls"], space["enable_mkldnn"]
+    return space
+
+
+def load_labels(directory: str) -> t.List[t.Tuple[Image.Image, t.List[str]]]:
+    samples = []
+    with open(os.path.join(directory, "labels.txt"), encoding="utf-8") as f:
+        for line in f:
+            if not line.strip():
+                continue
+            name, *labels = line.rstrip("\r\n").split("\t")
+            samples.append((Image.open(os.path.join(directory, name)).convert("RGB"), labels))
+    return samples
+
+
+def measure(backend_name: str, profile: OCRProfile, directory: str) -> t.Dict[str, float]:
+    from .base import create_backend
+    crops = load_labels(directory)
+    frames_dir = os.path.join(directory, "frames")
+    frames = load_labels(frames_dir) if os.path.exists(os.path.join(frames_dir, "labels.txt")) else []
+
+    backend = create_backend(backend_name, profile)
+    backend.load()
+    backend._loaded = True
+    images = [image for image, _ in crops]
+    # 预热
+    backend.recognize_batch(images)
+    for image, _ in frames[:1]:
+        backend.detect(image)
+
+    start = time.perf_counter()
+    for _ in range(ROUNDS):
+        results = backend.recognize_batch(images)
+    recognize_ms = (time.perf_counter() - start) / ROUNDS * 1000
+    correct = sum(text == labels[0] for (text, _), (_, labels) in zip(results, crops))
+
+    start = time.perf_counter()
+    for _ in range(ROUNDS):
+        detected = [{item[2] for item in backend.detect(image)} for image, _ in frames]
+    detect_ms = (time.perf_counter() - start) / ROUNDS * 1000
+    correct += sum(set(labels) <= texts for texts, (_, labels) in zip(detected, frames))
+
+    return {
+        # 全部样本识别一遍的耗时
+        "elapsed_ms": recognize_ms + detect_ms,
+        "accuracy": correct / max(len(crops) + len(frames), 1),
+    }
+
+
+class Tuner:
+    def __init__(self, backend_name: str, directory: str, workers: int) -> None:
+        self.backend_name = backend_name
+        self.directory = directory
+        self.space = search_space(backend_name, workers)
+        self._results: t.Dict[t.Tuple[t.Any, ...], t.Dict[str, float]] = {}
+        self._context = multiprocessing.get_context("spawn")
+
+    def evaluate(self, profile: OCRProfile) -> t.Dict[str, float]:
+        key = tuple(profile.as_dict().values())
+        if key not in self._results:
+            # 每次使用新进程，避免上一组参数的线程池和已编译的算子影响结果
+            with self._context.Pool(1) as pool:
+                result = pool.apply(measure, (self.backend_name, profile, self.directory))
+            print(f"{profile}: {result['elapsed_ms']:.1f} ms, 准确率 {result['accuracy']:.1%}")
+            self._results[key] = result
+        return self._results[key]
+
+    def tune(self, profile: OCRProfile, floor: t.Optional[float] = None) -> OCRProfile:
+        baseline = self.evaluate(profile)
+        if floor is None:
+            floor = baseline["accuracy"]
+        best, best_result = profile, baseline
+        if best_result["accuracy"] < floor:
+            # 当前参数达不到下限时，先按准确率选择
+            best_result = {"elapsed_ms": float("inf"), "accuracy": best_result["accuracy"]}
+
+        # 逐项调整，直到一整轮没有变化
+        changed = True
+        while changed:
+            changed = False
+            for name, values in self.space.items():
+                for value in values:
+                    if value == getattr(best, name):
+                        continue
+                    candidate = best.replace(**{name: value})
+                    result = self.evaluate(candidate)
+                    if self._better(result, best_result, floor):
+                        best, best_result = candidate, result
+                        changed = True
+        return best
+
+    @staticmethod
+    def _better(result: t.Dict[str, float], best: t.Dict[str, float], floor: float) -> bool:
+        if result["accuracy"] >= floor:
+            return best["accuracy"] < floor or result["elapsed_ms"] < best["elapsed_ms"]
+        return best["accuracy"] < floor and result["accuracy"] > best["accuracy"]
+
+
+if __name__ == "__main__":
+    directory = sys.argv[1]
+    floor = float(sys.argv[2]) if len(sys.argv) > 2 else None
+
+    config = configparser.ConfigParser()
+    config.read(os.path.join(os.getcwd(), "ocr.ini"))
+    backend_name = config.get("OCR", "backend", fallback="paddle")
+    workers = config.getint("OCR", "workers", fallback=0)
+
+    tuner = Tuner(backend_name, directory, workers)
+    current = OCRProfile.load()
+    best = tuner.tune(current, floor)
+    result = tuner.evaluate(best)
+    print(f"最快参数: {best}")
+    print(f"耗时 {result['elapsed_ms']:.1f} ms (当前 {tuner.evaluate(current)['elapsed_ms']:.1f} ms), "
+          f"准确率 {result['accuracy']:.1%}")
+    best.save()
+    print(f"已保存到 {TUNED_PROFILE_PATH}")
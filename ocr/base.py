@@ -0,0 +1,119 @@
+import typing as t
+import importlib
+import threading
+from abc import ABC, abstractmethod
+from PIL import Image
+import numpy as np
+from .profile import OCRProfile
+
+ImageLike = t.Union[Image.Image, np.ndarray]
+
+Rect = t.Tuple[int, int, int, int]
+
+DetectResult = t.List[t.Tuple[int, int, str, float]]
+
+# 后端名称到 "模块:类名" 的映射，选中时才导入，避免加载用不到的推理库
+BACKENDS: t.Dict[str, str] = {
+    "paddle": "ocr.ocr_paddle:OCR",
+    "onnx": "ocr.ocr_onnx:ONNXOCR",
+}
+
+
+def create_backend(name: str, profile: t.Optional[OCRProfile] = None) -> 'OCRBackend':
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown OCR backend: {name}")
+    module_name, class_name = BACKENDS[name].split(":")
+    return getattr(importlib.import_module(module_name), class_name)(profile=profile)
+
+
+def to_array(image: ImageLike) -> np.ndarray:
+    # 统一为 H x W x 3 的 uint8 数组，透明通道直接丢弃
+    if isinstance(image, Image.Image):
+        image = image.convert("RGB")
+    array = np.asarray(image, dtype=np.uint8)
+    if array.ndim == 2:
+        return np.stack([array] * 3, axis=-1)
+    return array[..., :3]
+
+
+def detect_region(image: ImageLike, rect: t.Optional[Rect] = None, scale: float = 1.0) -> Image.Image:
+    # 截取检测区域并缩放，文字较大时缩小后检测耗时随像素数下降
+    if not isinstance(image, Image.Image):
+        image = Image.fromarray(np.asarray(image))
+    if rect is not None:
+        image = image.crop(rect)
+    if scale != 1.0:
+        width, height = image.size
+        image = image.resize((max(int(width * scale), 1), max(int(height * scale), 1)), Image.BILINEAR)
+    return image
+
+
+def remap(result: DetectResult, rect: t.Optional[Rect] = None, scale: float = 1.0) -> DetectResult:
+    # 将区域内缩放后的坐标换算回设备坐标
+    left, top = (rect[0], rect[1]) if rect is not None else (0, 0)
+    return [
+        (int(x / scale) + left, int(y / scale) + top, name, confidence)
+        for x, y, name, confidence in result
+    ]
+
+
+class OCRBackend(ABC):
+    """OCR 后端接口
+
+    子类实现模型加载和推理，懒加载与加锁由基类负责，多台设备共用一个实例
+    roi 为识别区域标识，供缓存等包装层使用，后端本身忽略
+    """
+    def __init__(self) -> None:
+        self._loaded = False
+        self._lock = threading.Lock()
+
+    @abstractmethod
+    def load(self) -> None:
+        pass
+
+    @abstractmethod
+    def _detect(self, image: np.ndarray) -> DetectResult:
+        pass
+
+    @abstractmethod
+    def _recognize_batch(self, images: t.List[np.ndarray]) -> t.List[t.Tuple[str, float]]:
+        pass
+
+    def _recognize(self, image: np.ndarray) -> t.Tuple[str, float]:
+        return self._recognize_batch([image])[0]
+
+    def _ensure_loaded(self) -> None:
+        # 懒加载，避免一开始就加载模型
+        if not self._loaded:
+            self.load()
+            self._loaded = True
+
+    def detect(self,
+               image: ImageLike,
+               rect: t.Optional[Rect] = None,
+               scale: float = 1.0,
+               roi: t.Optional[str] = None) -> DetectResult:
+        """检测并识别 rect 区域内的文字，scale 小于 1 时先缩小再检测
+
+        返回的中心坐标已换算回整张截图的坐标
+        """
+        array = to_array(detect_region(image, rect, scale))
+        with self._lock:
+            self._ensure_loaded()
+            result = self._detect(array)
+        return remap(result, rect, scale)
+
+    def recognize(self, image: ImageLike, roi: t.Optional[str] = None) -> t.Tuple[str, float]:
+        with self._lock:
+            self._ensure_loaded()
+            return self._recognize(to_array(image))
+
+    def recognize_batch(self,
+                        images: t.Sequence[ImageLike],
+                        rois: t.Optional[t.Sequence[t.Optional[str]]] = None) -> t.List[t.Tuple[str, float]]:
+        if not images:
+            return []
+        arrays = [to_array(image) for image in images]
+        with self._lock:
+            self._ensure_loaded()
+            return self._recognize_batch(arrays)
@@ -0,0 +1,130 @@
+import typing as t
+import hashlib
+import threading
+from collections import OrderedDict
+from PIL import Image
+import numpy as np
+from .base import Rect, DetectResult, detect_region
+
+ImageLike = t.Union[Image.Image, np.ndarray]
+
+
+def dhash(image: ImageLike) -> t.Tuple[bytes, np.ndarray]:
+    """差值哈希，返回哈希值和计算哈希用的灰度缩略图
+
+    缩略图固定 8 行，列数随宽高比增加，文字区域横向保留更多细节
+    相邻像素差超过阈值才记为 1，纯色背景上的噪声不会改变哈希
+    """
+    if not isinstance(image, Image.Image):
+        image = Image.fromarray(np.asarray(image))
+    width, height = image.size
+    cols = min(max(round(8 * width / max(height, 1)), 8), 64)
+    thumbnail = np.asarray(image.convert("L").resize((cols + 1, 8), Image.BILINEAR), dtype=np.int16)
+    bits = thumbnail[:, 1:] - thumbnail[:, :-1] > 8
+    return np.packbits(bits).tobytes(), thumbnail
+
+
+def exact_hash(image: ImageLike) -> bytes:
+    # 按全部像素计算的哈希，只有内容完全相同才会相等
+    array = np.ascontiguousarray(np.asarray(image))
+    return hashlib.blake2b(array.tobytes(), digest_size=16).digest()
+
+
+class OCRCache:
+    """OCR 结果缓存，包装在 OCR 或 OCRPool 外层
+
+    以 (识别区域标识, 尺寸, 差值哈希) 为键，命中后还要求缩略图逐点灰度差
+    不超过 tolerance，避免只差一个数字的截图被误判为相同
+    检测的区域较大，缩略图的每一点平均了过多像素，不同的列表页也可能相差很小，
+    所以检测按全部像素的哈希精确匹配
+    """
+    def __init__(self, backend: t.Any, max_entries: int = 256, tolerance: int = 16) -> None:
+        self.backend = backend
+        self.max_entries = max_entries
+        self.tolerance = tolerance
+        self._entries: 'OrderedDict[t.Hashable, t.Tuple[np.ndarray, t.Any]]' = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def _key(self, method: str, image: ImageLike, roi: t.Optional[str]) -> t.Tuple[t.Hashable, np.ndarray]:
+        size = image.size if isinstance(image, Image.Image) else np.asarray(image).shape[1::-1]
+        digest, thumbnail = dhash(image)
+        return (method, roi, tuple(size), digest), thumbnail
+
+    def _get(self, key: t.Hashable, thumbnail: t.Optional[np.ndarray]) -> t.Tuple[bool, t.Any]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and (thumbnail is None or np.abs(entry[0] - thumbnail).max() <= self.tolerance):
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return True, entry[1]
+            self.misses += 1
+            return False, None
+
+    def _put(self, key: t.Hashable, thumbnail: t.Optional[np.ndarray], result: t.Any) -> None:
+        with self._lock:
+            self._entries[key] = (thumbnail, result)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def _cached(self, method: str, image: ImageLike, roi: t.Optional[str]) -> t.Any:
+        key, thumbnail = self._key(method, image, roi)
+        hit, result = self._get(key, thumbnail)
+        if not hit:
+            result = getattr(self.backend, method)(image)
+            self._put(key, thumbnail, result)
+        return result
+
+    def detect(self,
+               image: ImageLike,
+               rect: t.Optional[Rect] = None,
+               scale: float = 1.0,
+               roi: t.Optional[str] = None) -> DetectResult:
+        # 以检测区域的内容为键，结果为已换算的设备坐标
+        key = ("detect", roi, rect, scale, exact_hash(detect_region(image, rect)))
+        hit, result = self._get(key, None)
+        if not hit:
+            result = self.backend.detect(image, rect, scale)
+            self._put(key, None, result)
+        return result
+
+    def recognize(self, image: ImageLike, roi: t.Optional[str] = None) -> t.Tuple[str, float]:
+        return self._cached("recognize", image, roi)
+
+    def recognize_batch(self,
+                        images: t.Sequence[ImageLike],
+                        rois: t.Optional[t.Sequence[t.Optional[str]]] = None) -> t.List[t.Tuple[str, float]]:
+        # 只把未命中的图像交给模型，结果按输入顺序返回
+        rois = rois or [None] * len(images)
+        keys = [self._key("recognize", image, roi) for image, roi in zip(images, rois)]
+        results: t.List[t.Any] = []
+        missed: t.List[int] = []
+        for index, (key, thumbnail) in enumerate(keys):
+            hit, result = self._get(key, thumbnail)
+            results.append(result)
+            if not hit:
+                missed.append(index)
+        if missed:
+            recognized = self.backend.recognize_batch([images[index] for index in missed])
+            for index, result in zip(missed, recognized):
+                results[index] = result
+                self._put(*keys[index], result)
+        return results
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    @property
+    def hit_rate(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total > 0 else 0.0
+
+    def __getattr__(self, name: str) -> t.Any:
+        # 其余属性和方法交给被包装的对象
+        if name == "backend":
+            raise AttributeError(name)
+        return getattr(self.backend, name)
+
@@ -0,0 +1,108 @@
+import typing as t
+import threading
+from PIL import Image
+import numpy as np
+from .base import ImageLike, Rect, DetectResult, detect_region
+
+
+class ChangeGate:
+    """按识别区域记录上一次变化时的缩小灰度图，判断区域内容是否变化
+
+    参考图只在判定为变化时更新，缓慢的渐变也会累积到阈值
+    """
+    def __init__(self, threshold: int = 24, factor: int = 2) -> None:
+        # 比较前长宽各缩小 factor 倍以平滑噪声，任一点灰度差超过 threshold 认为变化
+        self.threshold = threshold
+        self.factor = factor
+        self._last: t.Dict[str, np.ndarray] = {}
+        self._lock = threading.Lock()
+
+    def _thumbnail(self, image: ImageLike) -> np.ndarray:
+        if not isinstance(image, Image.Image):
+            image = Image.fromarray(np.asarray(image))
+        width, height = image.size
+        size = (max(width // self.factor, 1), max(height // self.factor, 1))
+        return np.asarray(image.convert("L").resize(size, Image.BILINEAR), dtype=np.int16)
+
+    def changed(self, roi: str, image: ImageLike) -> bool:
+        thumbnail = self._thumbnail(image)
+        with self._lock:
+            last = self._last.get(roi)
+            changed = (
+                last is None
+                or last.shape != thumbnail.shape
+                or int(np.abs(thumbnail - last).max()) > self.threshold
+            )
+            if changed:
+                self._last[roi] = thumbnail
+        return changed
+
+    def forget(self, roi: str) -> None:
+        with self._lock:
+            self._last.pop(roi, None)
+
+
+class OCRGate:
+    """区域未变化时直接返回该区域上一次的识别结果，包装在 OCR 后端外层
+
+    只对指定了 roi 的调用生效，多台设备共用时状态按设备区分 (设备的工作线程以设备序列号命名)
+    """
+    def __init__(self, backend: t.Any, threshold: int = 24) -> None:
+        self.backend = backend
+        self.gate = ChangeGate(threshold)
+        self._results: t.Dict[str, t.Any] = {}
+        # 每个区域一把锁，判断、识别和保存结果之间不会插入同一区域的其他调用
+        self._locks: t.Dict[str, threading.Lock] = {}
+        self._locks_lock = threading.Lock()
+        # 因区域未变化而省去的识别次数
+        self.skipped = 0
+        self.passed = 0
+
+    def _lock(self, key: str) -> threading.Lock:
+        with self._locks_lock:
+            return self._locks.setdefault(key, threading.Lock())
+
+    def _gated(self, roi: str, region: ImageLike, infer: t.Callable[[], t.Any]) -> t.Any:
+        key = f"{threading.current_thread().name}:{roi}"
+        with self._lock(key):
+            if not self.gate.changed(key, region) and key in self._results:
+                self.skipped += 1
+                return self._results[key]
+            self.passed += 1
+            try:
+                result = infer()
+            except Exception:
+                # 识别失败时下次必须重新识别
+                self.gate.forget(key)
+                raise
+            self._results[key] = result
+            return result
+
+    def recognize(self, image: ImageLike, roi: t.Optional[str] = None) -> t.Tuple[str, float]:
+        if roi is None:
+            return self.backend.recognize(image)
+        return self._gated(f"recognize:{roi}", image, lambda: self.backend.recognize(image, roi=roi))
+
+    def detect(self,
+               image: ImageLike,
+               rect: t.Optional[Rect] = None,
+               scale: float = 1.0,
+               roi: t.Optional[str] = None) -> DetectResult:
+        if roi is None:
+            return self.backend.detect(image, rect, scale)
+        return self._gated(
+            f"detect:{roi}:{rect}:{scale}",
+            detect_region(image, rect),
+            lambda: self.backend.detect(image, rect, scale, roi=roi)
+        )
+
+    def recognize_batch(self,
+                        images: t.Sequence[ImageLike],
+                        rois: t.Optional[t.Sequence[t.Optional[str]]] = None) -> t.List[t.Tuple[str, float]]:
+        return self.backend.recognize_batch(images, rois)
+
+    def __getattr__(self, name: str) -> t.Any:
+        # 其余属性和方法交给被包装的对象
+        if name == "backend":
+            raise AttributeError(name)
+        return getattr(self.backend, name)
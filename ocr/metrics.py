@@ -0,0 +1,232 @@
+import typing as t
+import os
+import re
+import sys
+import time
+import queue
+import threading
+from collections import deque, defaultdict
+from PIL import Image
+import numpy as np
+from .base import ImageLike, Rect, DetectResult, detect_region
+
+# 耗时分桶上限 (毫秒) 和置信度分桶上限
+LATENCY_BUCKETS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, float("inf"))
+CONFIDENCE_BUCKETS = (0.5, 0.6, 0.7, 0.8, 0.9, 0.95, 1.0)
+
+# 保存检测样本时按文字中心截取的区域大小，检测结果只有中心坐标，按字数估计宽度
+SAMPLE_CHAR_WIDTH = 40
+SAMPLE_HEIGHT = 64
+
+# 查找调用位置时跳过的模块，has_label 等辅助函数记在调用它的场景方法上
+SKIPPED_MODULES = ("ocr", "game.template")
+
+
+def call_site(depth: int = 2) -> str:
+    # 第一个不在 OCR 相关模块中的栈帧，形如 ExchangeBuyScene.select_item
+    frame = sys._getframe(depth)
+    while frame is not None:
+        module = frame.f_globals.get("__name__", "")
+        if not any(module == name or module.startswith(f"{name}.") for name in SKIPPED_MODULES):
+            owner = frame.f_locals.get("self", frame.f_locals.get("cls"))
+            name = frame.f_code.co_name
+            if owner is not None:
+                owner_name = owner.__name__ if isinstance(owner, type) else type(owner).__name__
+                return f"{owner_name}.{name}"
+            return name
+        frame = frame.f_back
+    return "unknown"
+
+
+class Sample(t.NamedTuple):
+    latency_ms: float
+    pixels: int
+    confidence: float
+
+
+class SampleWriter:
+    """把低置信度的截图保存到 data/ocr_samples/<调用位置>/
+
+    每个目录最多保存 max_samples 张，超出时删除最早的，
+    labels.txt 记录文件名和识别结果，校对后可直接作为 benchmark.ocr_backends 的样本
+    """
+    def __init__(self, directory: str, max_samples: int = 200) -> None:
+        self.directory = directory
+        self.max_samples = max_samples
+        self._labels: t.Dict[str, t.Dict[str, str]] = {}
+        self._queue: 'queue.Queue[t.Tuple[str, Image.Image, str]]' = queue.Queue(maxsize=64)
+        self._thread: t.Optional[threading.Thread] = None
+
+    def submit(self, site: str, image: Image.Image, text: str) -> None:
+        if self._thread is None:
+            # 在后台线程中编码和写入，不阻塞调用方
+            self._thread = threading.Thread(target=self._write_loop, daemon=True)
+            self._thread.start()
+        try:
+            self._queue.put_nowait((site, image.copy(), text))
+        except queue.Full:
+            pass
+
+    def _load_labels(self, site_dir: str) -> t.Dict[str, str]:
+        if site_dir not in self._labels:
+            labels: t.Dict[str, str] = {}
+            labels_file = os.path.join(site_dir, "labels.txt")
+            if os.path.exists(labels_file):
+                with open(labels_file, encoding="utf-8") as f:
+                    for line in f:
+                        if "\t" in line:
+                            name, text = line.rstrip("\r\n").split("\t", 1)
+                            labels[name] = text
+            self._labels[site_dir] = labels
+        return self._labels[site_dir]
+
+    def _write_loop(self) -> None:
+        while True:
+            site, image, text = self._queue.get()
+            try:
+                self._write(site, image, text)
+            except OSError:
+                # 磁盘错误不影响识别
+                pass
+
+    def _write(self, site: str, image: Image.Image, text: str) -> None:
+        site_dir = os.path.join(self.directory, re.sub(r"[^\w.]", "_", site))
+        os.makedirs(site_dir, exist_ok=True)
+        labels = self._load_labels(site_dir)
+        name = f"{time.time_ns()}.png"
+        image.save(os.path.join(site_dir, name))
+        labels[name] = text.replace("\t", " ").replace("\n", " ")
+        while len(labels) > self.max_samples:
+            oldest = next(iter(labels))
+            labels.pop(oldest)
+            try:
+                os.remove(os.path.join(site_dir, oldest))
+            except FileNotFoundError:
+                pass
+        with open(os.path.join(site_dir, "labels.txt"), "w", encoding="utf-8") as f:
+            for file_name, label in labels.items():
+                f.write(f"{file_name}\t{label}\n")
+
+
+class OCRMetrics:
+    """按调用位置记录 OCR 耗时、输入像素数和置信度，包装在最外层
+
+    每个调用位置保留最近 window 次调用，低于 sample_confidence 的图像交给 SampleWriter 保存，
+    检测只保存低置信度文字附近的小图，不保存整个检测区域
+    """
+    def __init__(self,
+                 backend: t.Any,
+                 window: int = 500,
+                 sample_confidence: float = 0.8,
+                 writer: t.Optional[SampleWriter] = None) -> None:
+        self.backend = backend
+        self.window = window
+        self.sample_confidence = sample_confidence
+        self.writer = writer
+        self._samples: t.Dict[str, t.Deque[Sample]] = defaultdict(lambda: deque(maxlen=self.window))
+        self._lock = threading.Lock()
+
+    def _record(self, site: str, latency_ms: float, pixels: int, confidence: float) -> None:
+        with self._lock:
+            self._samples[site].append(Sample(latency_ms, pixels, confidence))
+
+    def _save(self, site: str, image: Image.Image, confidence: float, text: str) -> None:
+        if self.writer is not None and confidence < self.sample_confidence:
+            self.writer.submit(site, image, text)
+
+    def detect(self,
+               image: ImageLike,
+               rect: t.Optional[Rect] = None,
+               scale: float = 1.0,
+               roi: t.Optional[str] = None) -> DetectResult:
+        site = call_site()
+        started_at = time.perf_counter()
+        result = self.backend.detect(image, rect, scale, roi=roi)
+        # 检测结果取最低置信度，未检测到文字记为 1
+        confidence = min((item[3] for item in result), default=1.0)
+        latency_ms = (time.perf_counter() - started_at) * 1000
+        if not isinstance(image, Image.Image):
+            image = Image.fromarray(np.asarray(image))
+        left, top, right, bottom = rect if rect is not None else (0, 0, image.width, image.height)
+        self._record(site, latency_ms, int((right - left) * (bottom - top) * scale * scale), confidence)
+        if self.writer is not None:
+            for x, y, name, item_confidence in result:
+                if item_confidence >= self.sample_confidence:
+                    continue
+                half_width = (len(name) + 1) * SAMPLE_CHAR_WIDTH // 2
+                box = (
+                    max(x - half_width, 0), max(y - SAMPLE_HEIGHT // 2, 0),
+                    min(x + half_width, image.width), min(y + SAMPLE_HEIGHT // 2, image.height),
+                )
+                self._save(site, image.crop(box), item_confidence, name)
+        return result
+
+    def recognize(self, image: ImageLike, roi: t.Optional[str] = None) -> t.Tuple[str, float]:
+        site = call_site()
+        started_at = time.perf_counter()
+        text, confidence = self.backend.recognize(image, roi=roi)
+        latency_ms = (time.perf_counter() - started_at) * 1000
+        region = detect_region(image)
+        self._record(site, latency_ms, region.width * region.height, confidence)
+        self._save(site, region, confidence, text)
+        return text, confidence
+
+    def recognize_batch(self,
+                        images: t.Sequence[ImageLike],
+                        rois: t.Optional[t.Sequence[t.Optional[str]]] = None) -> t.List[t.Tuple[str, float]]:
+        site = call_site()
+        started_at = time.perf_counter()
+        results = self.backend.recognize_batch(images, rois)
+        # 批量识别的耗时平均分给每张图
+        latency_ms = (time.perf_counter() - started_at) * 1000 / max(len(images), 1)
+        for image, (text, confidence) in zip(images, results):
+            region = detect_region(image)
+            self._record(site, latency_ms, region.width * region.height, confidence)
+            self._save(site, region, confidence, text)
+        return results
+
+    def samples(self, site: str) -> t.List[Sample]:
+        with self._lock:
+            return list(self._samples.get(site, ()))
+
+    def histogram(self, site: str, field: str = "latency_ms") -> t.List[t.Tuple[float, int]]:
+        # 返回 (分桶上限, 次数) 列表
+        buckets = LATENCY_BUCKETS if field == "latency_ms" else CONFIDENCE_BUCKETS
+        values = np.array([getattr(sample, field) for sample in self.samples(site)])
+        indices = np.searchsorted(buckets, values, side="left") if len(values) else np.array([], dtype=int)
+        return [(bucket, int((indices == i).sum())) for i, bucket in enumerate(buckets)]
+
+    def summary(self) -> t.Dict[str, t.Dict[str, float]]:
+        with self._lock:
+            sites = {site: list(samples) for site, samples in self._samples.items()}
+        result = {}
+        for site, samples in sites.items():
+            latency = np.array([sample.latency_ms for sample in samples])
+            confidence = np.array([sample.confidence for sample in samples])
+            result[site] = {
+                "calls": len(samples),
+                "p50_ms": float(np.percentile(latency, 50)),
+                "p95_ms": float(np.percentile(latency, 95)),
+                "mean_pixels": float(np.mean([sample.pixels for sample in samples])),
+                "mean_confidence": float(confidence.mean()),
+                "low_confidence": int((confidence < self.sample_confidence).sum()),
+            }
+        return result
+
+    def report(self) -> str:
+        lines = []
+        # 按 p95 耗时从高到低排列
+        for site, stats in sorted(self.summary().items(), key=lambda item: -item[1]["p95_ms"]):
+            lines.append(
+                f"{site}: {stats['calls']} 次, "
+                f"耗时 p50 {stats['p50_ms']:.1f} ms / p95 {stats['p95_ms']:.1f} ms, "
+                f"平均 {stats['mean_pixels'] / 1000:.0f}K 像素, "
+                f"平均置信度 {stats['mean_confidence']:.3f}, 低置信度 {stats['low_confidence']} 次"
+            )
+        return "\n".join(lines)
+
+    def __getattr__(self, name: str) -> t.Any:
+        # 其余属性和方法交给被包装的对象
+        if name == "backend":
+            raise AttributeError(name)
+        return getattr(self.backend, name)
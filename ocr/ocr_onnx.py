@@ -0,0 +1,197 @@
+"""使用 onnxruntime 在 CPU 上运行 PP-OCRv4 检测与识别模型
+
+模型由 paddle2onnx 从 ocr/model 下的推理模型导出，放在 ocr/model/onnx:
+    det.onnx             ch_PP-OCRv4_det_infer
+    rec.onnx             ch_PP-OCRv4_rec_infer
+    ppocr_keys_v1.txt    识别字典，与 PaddleOCR 自带的相同
+
+预处理和后处理按 PaddleOCR 的默认参数实现，不包含方向分类，游戏文字都是正向的
+"""
+import typing as t
+import math
+import os
+import numpy as np
+from PIL import Image
+from .base import OCRBackend
+from .profile import OCRProfile
+
+MODEL_DIR = os.path.join(os.path.dirname(__file__), "model/onnx")
+
+
+class ONNXOCR(OCRBackend):
+    def __init__(self,
+                 model_dir: str = MODEL_DIR,
+                 profile: t.Optional[OCRProfile] = None,
+                 det_thresh: float = 0.3,
+                 det_box_thresh: float = 0.6,
+                 det_unclip_ratio: float = 1.5,
+                 drop_score: float = 0.5) -> None:
+        super().__init__()
+        self.model_dir = model_dir
+        self.profile = profile or OCRProfile()
+        self.det_limit_side_len = self.profile.det_limit_side_len
+        self.det_thresh = det_thresh
+        self.det_box_thresh = det_box_thresh
+        self.det_unclip_ratio = det_unclip_ratio
+        self.drop_score = drop_score
+        self.rec_batch_num = self.profile.rec_batch_num
+        self.det_session = None
+        self.rec_session = None
+        self.characters: t.List[str] = []
+
+    def load(self) -> None:
+        print("OCR正在加载中...")
+        import onnxruntime
+        options = onnxruntime.SessionOptions()
+        options.log_severity_level = 3
+        options.intra_op_num_threads = self.profile.cpu_threads
+        providers = ["CPUExecutionProvider"]
+        self.det_session = onnxruntime.InferenceSession(
+            os.path.join(self.model_dir, "det.onnx"), options, providers=providers)
+        self.rec_session = onnxruntime.InferenceSession(
+            os.path.join(self.model_dir, "rec.onnx"), options, providers=providers)
+        with open(os.path.join(self.model_dir, "ppocr_keys_v1.txt"), encoding="utf-8") as f:
+            # 0 为 CTC 空白，字典末尾追加空格
+            self.characters = ["blank"] + [line.rstrip("\r\n") for line in f] + [" "]
+
+    # ---------------- 检测 ----------------
+
+    def _det_preprocess(self, image: np.ndarray) -> t.Tuple[np.ndarray, float, float]:
+        height, width = image.shape[:2]
+        ratio = 1.0
+        if max(height, width) > self.det_limit_side_len:
+            ratio = self.det_limit_side_len / max(height, width)
+        # 宽高缩放到 32 的倍数
+        resize_h = max(int(round(height * ratio / 32) * 32), 32)
+        resize_w = max(int(round(width * ratio / 32) * 32), 32)
+        resized = np.asarray(Image.fromarray(image).resize((resize_w, resize_h), Image.BILINEAR), dtype=np.float32)
+        mean = np.array([0.485, 0.456, 0.406], dtype=np.float32)
+        std = np.array([0.229, 0.224, 0.225], dtype=np.float32)
+        normalized = (resized / 255.0 - mean) / std
+        return normalized.transpose(2, 0, 1)[np.newaxis], resize_h / height, resize_w / width
+
+    def _det_postprocess(self,
+                         prob: np.ndarray,
+                         ratio_h: float,
+                         ratio_w: float,
+                         shape: t.Tuple[int, int]) -> t.List[np.ndarray]:
+        import cv2
+        bitmap = (prob > self.det_thresh).astype(np.uint8)
+        contours, _ = cv2.findContours(bitmap, cv2.RETR_LIST, cv2.CHAIN_APPROX_SIMPLE)
+        height, width = shape
+        boxes = []
+        for contour in contours[:1000]:
+            (cx, cy), (w, h), angle = cv2.minAreaRect(contour)
+            if min(w, h) < 3:
+                continue
+            # 框内概率均值作为置信度
+            mask = np.zeros_like(bitmap)
+            cv2.fillPoly(mask, [contour.reshape(-1, 2)], 1)
+            if prob[mask.astype(bool)].mean() < self.det_box_thresh:
+                continue
+            # 按 DB 的 unclip 把收缩的文字核心向外扩张
+            area, perimeter = w * h, 2 * (w + h)
+            distance = area * self.det_unclip_ratio / perimeter
+            w, h = w + 2 * distance, h + 2 * distance
+            if min(w, h) < 5:
+                continue
+            box = cv2.boxPoints(((cx, cy), (w, h), angle))
+            box[:, 0] = np.clip(box[:, 0] / ratio_w, 0, width - 1)
+            box[:, 1] = np.clip(box[:, 1] / ratio_h, 0, height - 1)
+            boxes.append(self._order_points(box))
+        # 从上到下、从左到右排序，同一行的框按 x 排序
+        boxes.sort(key=lambda box: (box[0][1], box[0][0]))
+        for i in range(len(boxes) - 1):
+            for j in range(i, -1, -1):
+                if abs(boxes[j + 1][0][1] - boxes[j][0][1]) < 10 and boxes[j + 1][0][0] < boxes[j][0][0]:
+                    boxes[j], boxes[j + 1] = boxes[j + 1], boxes[j]
+                else:
+                    break
+        return boxes
+
+    @staticmethod
+    def _order_points(box: np.ndarray) -> np.ndarray:
+        # 顺序为左上、右上、右下、左下
+        by_x = box[np.argsort(box[:, 0])]
+        left = by_x[:2][np.argsort(by_x[:2, 1])]
+        right = by_x[2:][np.argsort(by_x[2:, 1])]
+        return np.array([left[0], right[0], right[1], left[1]], dtype=np.float32)
+
+    @staticmethod
+    def _crop_box(image: np.ndarray, box: np.ndarray) -> np.ndarray:
+        import cv2
+        width = int(max(np.linalg.norm(box[0] - box[1]), np.linalg.norm(box[2] - box[3])))
+        height = int(max(np.linalg.norm(box[0] - box[3]), np.linalg.norm(box[1] - box[2])))
+        target = np.array([[0, 0], [width, 0], [width, height], [0, height]], dtype=np.float32)
+        matrix = cv2.getPerspectiveTransform(box, target)
+        crop = cv2.warpPerspective(image, matrix, (width, height),
+                                   borderMode=cv2.BORDER_REPLICATE, flags=cv2.INTER_CUBIC)
+        # 竖长的框旋转为横向
+        if height / max(width, 1) >= 1.5:
+            crop = np.rot90(crop)
+        return crop
+
+    def _detect(self, image: np.ndarray) -> t.List[t.Tuple[int, int, str, float]]:
+        tensor, ratio_h, ratio_w = self._det_preprocess(image)
+        prob = self.det_session.run(None, {self.det_session.get_inputs()[0].name: tensor})[0][0, 0]
+        boxes = self._det_postprocess(prob, ratio_h, ratio_w, image.shape[:2])
+        if not boxes:
+            # 未检测到任何文字，返回空列表
+            return []
+
+        recognized = self._recognize_batch([self._crop_box(image, box) for box in boxes])
+        result = []
+        for box, (name, confidence) in zip(boxes, recognized):
+            if confidence < self.drop_score:
+                continue
+            (x1, y1), (x2, y2) = box[0], box[2]
+            # 计算中心坐标
+            result.append((int((x1 + x2) / 2), int((y1 + y2) / 2), name, confidence))
+        return result
+
+    # ---------------- 识别 ----------------
+
+    def _rec_preprocess(self, image: np.ndarray, max_wh_ratio: float) -> np.ndarray:
+        # 高度固定 48，宽度按比例缩放后右侧补零到本批次最大宽度
+        img_h = 48
+        img_w = int(img_h * max_wh_ratio)
+        height, width = image.shape[:2]
+        resized_w = min(img_w, int(math.ceil(img_h * width / max(height, 1))))
+        resized = np.asarray(Image.fromarray(image).resize((max(resized_w, 1), img_h), Image.BILINEAR), dtype=np.float32)
+        normalized = (resized / 255.0 - 0.5) / 0.5
+        padded = np.zeros((3, img_h, img_w), dtype=np.float32)
+        padded[:, :, :resized.shape[1]] = normalized.transpose(2, 0, 1)
+        return padded
+
+    def _ctc_decode(self, probs: np.ndarray) -> t.List[t.Tuple[str, float]]:
+        results = []
+        indices = probs.argmax(axis=2)
+        scores = probs.max(axis=2)
+        for index, score in zip(indices, scores):
+            # 去掉重复字符和空白
+            keep = np.ones(len(index), dtype=bool)
+            keep[1:] = index[1:] != index[:-1]
+            keep &= index != 0
+            text = "".join(self.characters[i] for i in index[keep])
+            confidence = float(score[keep].mean()) if keep.any() else 0.0
+            results.append((text, confidence))
+        return results
+
+    def _recognize_batch(self, images: t.List[np.ndarray]) -> t.List[t.Tuple[str, float]]:
+        # 按宽高比排序后分批，同批图像补齐到相同宽度，减少补零
+        ratios = [image.shape[1] / max(image.shape[0], 1) for image in images]
+        order = np.argsort(ratios)
+        results: t.List[t.Tuple[str, float]] = [("", 0.0)] * len(images)
+        for start in range(0, len(images), self.rec_batch_num):
+            batch = order[start:start + self.rec_batch_num]
+            max_wh_ratio = max(320 / 48, max(ratios[i] for i in batch))
+            tensor = np.stack([self._rec_preprocess(images[i], max_wh_ratio) for i in batch])
+            probs = self.rec_session.run(None, {self.rec_session.get_inputs()[0].name: tensor})[0]
+            for i, result in zip(batch, self._ctc_decode(probs)):
+                results[i] = result
+        return results
+
+
+if __name__ == '__main__':
+    ocr = ONNXOCR()
+    ocr.load()
@@ -1,14 +1,17 @@
 import typing as t
-from PIL import Image
 import numpy as np
 import os
+from .base import OCRBackend
+from .profile import OCRProfile
 
 
-class OCR:
-    def __init__(self):
+class OCR(OCRBackend):
+    def __init__(self, profile: t.Optional[OCRProfile] = None):
+        super().__init__()
         self.ocr = None
+        self.profile = profile or OCRProfile()
 
-    def initailize(self):
+    def load(self):
         print("OCR正在加载中...")
         # 延迟导入paddleocr库
         # 不太懂为什么仅仅只是import paddleocr都会这么慢
@@ -18,27 +21,23 @@ class OCR:
         rec_model_dir = os.path.join(os.path.dirname(__file__), 'model/rec/ch/ch_PP-OCRv4_rec_infer')
         cls_model_dir = os.path.join(os.path.dirname(__file__), 'model/cls/ch_ppocr_mobile_v2.0_cls_infer')
         self.ocr = PaddleOCR(
-            use_angle_cls=True, 
-            lang='ch', 
-            show_log=False, 
+            lang='ch',
+            show_log=False,
             use_gpu=False,
             det_model_dir=det_model_dir,
             rec_model_dir=rec_model_dir,
-            cls_model_dir=cls_model_dir
+            cls_model_dir=cls_model_dir,
+            **self.profile.as_dict()
         )
 
-    def detect(self, image: Image.Image) -> t.List[t.Tuple[int, int, str, float]]:
-        image = np.array(image)
+    def _detect(self, image: np.ndarray) -> t.List[t.Tuple[int, int, str, float]]:
         result = []
-        # 懒加载，避免一开始就加载模型
-        if self.ocr is None:
-            self.initailize()
-        detect_result = self.ocr.ocr(image, det=True)[0]
+        detect_result = self.ocr.ocr(image, det=True, cls=self.profile.use_angle_cls)[0]
 
         if detect_result is None:
             # 未检测到任何文字，返回空列表
             return result
-        
+
         for positions, name_and_confidence in detect_result:
             left_top, _, right_bottom, _ = positions
             x1, y1 = left_top
@@ -46,24 +45,26 @@ class OCR:
             # 计算中心坐标
             x: int = int((x1 + x2) / 2)
             y: int = int((y1 + y2) / 2)
-            
+
             name, confidence = name_and_confidence
             result.append((x, y, name, confidence))
         return result
 
-
-    
-    def recognize(self, image: Image.Image) -> t.Tuple[str, float]:
-        image = np.array(image)
-        # 懒加载，避免一开始就加载模型
-        if self.ocr is None:
-            self.initailize()
-        recognize_result = self.ocr.ocr(image, det=False)[0][0]
+    def _recognize(self, image: np.ndarray) -> t.Tuple[str, float]:
+        recognize_result = self.ocr.ocr(image, det=False, cls=self.profile.use_angle_cls)[0][0]
         name, confidence = recognize_result
         return name, confidence
-    
+
+    def _recognize_batch(self, images: t.List[np.ndarray]) -> t.List[t.Tuple[str, float]]:
+        # 平铺的列表会被当作多页逐张识别，嵌套一层才会整批交给识别网络
+        # 识别网络按宽高比排序后补齐成批次推理，结果按输入顺序返回
+        recognize_result = self.ocr.ocr([images], det=False, cls=False)[0]
+        results = [(name, confidence) for name, confidence in recognize_result]
+        assert len(results) == len(images), f"{len(images)} images but {len(results)} results"
+        return results
+
 
 
 if __name__ == '__main__':
     ocr = OCR()
-    ocr.initailize()
\ No newline at end of file
+    ocr.load()
@@ -0,0 +1,135 @@
+import typing as t
+import threading
+import multiprocessing
+from concurrent.futures import Future, ProcessPoolExecutor
+from multiprocessing import shared_memory
+from PIL import Image
+import numpy as np
+from .base import OCRBackend, Rect, DetectResult, create_backend, detect_region, remap
+from .profile import OCRProfile
+
+# 工作进程中的 OCR 实例，由 _initialize 创建
+_worker_ocr: t.Optional[OCRBackend] = None
+
+
+def _initialize(backend: str, profile: t.Optional[OCRProfile]) -> None:
+    global _worker_ocr
+    _worker_ocr = create_backend(backend, profile)
+    _worker_ocr.load()
+
+
+def _run(method: str, name: str, shape: t.Tuple[int, ...]) -> t.Any:
+    # 在工作进程中直接使用共享内存中的图像，不经过 pickle
+    shm = shared_memory.SharedMemory(name=name)
+    image = np.ndarray(shape, dtype=np.uint8, buffer=shm.buf)
+    try:
+        return getattr(_worker_ocr, method)(image)
+    finally:
+        # 关闭共享内存前需要释放对它的引用
+        del image
+        shm.close()
+
+
+def _run_batch(name: str, shapes: t.List[t.Tuple[int, ...]]) -> t.List[t.Tuple[str, float]]:
+    # 一批图像依次存放在同一块共享内存中
+    shm = shared_memory.SharedMemory(name=name)
+    images = []
+    offset = 0
+    for shape in shapes:
+        image = np.ndarray(shape, dtype=np.uint8, buffer=shm.buf, offset=offset)
+        images.append(image)
+        offset += image.nbytes
+    try:
+        return _worker_ocr.recognize_batch(images)
+    finally:
+        del image, images
+        shm.close()
+
+
+class OCRPool:
+    """在多个进程中运行 OCR 后端，接口与 OCRBackend 相同
+
+    图像通过共享内存传给工作进程，互不相关的识别请求可以并行执行
+    """
+    def __init__(self,
+                 workers: int = 2,
+                 backend: str = "paddle",
+                 profile: t.Optional[OCRProfile] = None) -> None:
+        self.workers = workers
+        self.backend = backend
+        self.profile = profile
+        self._executor: t.Optional[ProcessPoolExecutor] = None
+        self._lock = threading.Lock()
+
+    @property
+    def executor(self) -> ProcessPoolExecutor:
+        # 懒加载，避免一开始就启动工作进程
+        with self._lock:
+            if self._executor is None:
+                print("OCR正在加载中...")
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.workers,
+                    mp_context=multiprocessing.get_context("spawn"),
+                    initializer=_initialize,
+                    initargs=(self.backend, self.profile)
+                )
+            return self._executor
+
+    def submit(self, method: str, image: t.Union[Image.Image, np.ndarray]) -> Future:
+        array = np.asarray(image, dtype=np.uint8)
+        shm = self._share([array])
+        return self._free_on_done(self.executor.submit(_run, method, shm.name, array.shape), shm)
+
+    def submit_batch(self, images: t.Sequence[t.Union[Image.Image, np.ndarray]]) -> Future:
+        arrays = [np.asarray(image.convert("RGB") if isinstance(image, Image.Image) else image, dtype=np.uint8)
+                  for image in images]
+        shm = self._share(arrays)
+        shapes = [array.shape for array in arrays]
+        return self._free_on_done(self.executor.submit(_run_batch, shm.name, shapes), shm)
+
+    @staticmethod
+    def _share(arrays: t.List[np.ndarray]) -> shared_memory.SharedMemory:
+        shm = shared_memory.SharedMemory(create=True, size=max(sum(array.nbytes for array in arrays), 1))
+        offset = 0
+        for array in arrays:
+            np.ndarray(array.shape, dtype=np.uint8, buffer=shm.buf, offset=offset)[...] = array
+            offset += array.nbytes
+        return shm
+
+    @staticmethod
+    def _free_on_done(future: Future, shm: shared_memory.SharedMemory) -> Future:
+        def free(_: Future) -> None:
+            shm.close()
+            shm.unlink()
+        future.add_done_callback(free)
+        return future
+
+    def detect(self,
+               image: t.Union[Image.Image, np.ndarray],
+               rect: t.Optional[Rect] = None,
+               scale: float = 1.0,
+               roi: t.Optional[str] = None) -> DetectResult:
+        # 在当前进程中截取和缩放，只把需要检测的像素传给工作进程
+        result = self.submit("detect", detect_region(image, rect, scale)).result()
+        return remap(result, rect, scale)
+
+    def recognize(self,
+                  image: t.Union[Image.Image, np.ndarray],
+                  roi: t.Optional[str] = None) -> t.Tuple[str, float]:
+        return self.submit("recognize", image).result()
+
+    def recognize_batch(self,
+                        images: t.Sequence[t.Union[Image.Image, np.ndarray]],
+                        rois: t.Optional[t.Sequence[t.Optional[str]]] = None) -> t.List[t.Tuple[str, float]]:
+        # 按工作进程数分成几批，每批在一个进程中一次推理，各批并行
+        if not images:
+            return []
+        size = -(-len(images) // self.workers)
+        futures = [self.submit_batch(images[i:i + size]) for i in range(0, len(images), size)]
+        return [result for future in futures for result in future.result()]
+
+    def shutdown(self) -> None:
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown()
+                self._executor = None
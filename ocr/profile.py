@@ -0,0 +1,70 @@
+import typing as t
+import configparser
+import os
+
+# 自动调优结果保存的位置，存在时覆盖 ocr.ini 中的 [Profile]
+TUNED_PROFILE_PATH = os.path.join(os.getcwd(), "data", "ocr_profile.ini")
+
+
+class OCRProfile:
+    """OCR 推理参数，对 paddle 和 onnx 后端都生效 (onnx 没有方向分类和 MKL-DNN 开关)"""
+    FIELDS: t.Dict[str, t.Callable[[str], t.Any]] = {
+        "use_angle_cls": lambda value: value.lower() in ("1", "true", "yes", "on"),
+        "enable_mkldnn": lambda value: value.lower() in ("1", "true", "yes", "on"),
+        "cpu_threads": int,
+        "rec_batch_num": int,
+        "det_limit_side_len": int,
+    }
+
+    def __init__(self,
+                 use_angle_cls: bool = False,
+                 enable_mkldnn: bool = True,
+                 cpu_threads: int = 4,
+                 rec_batch_num: int = 6,
+                 det_limit_side_len: int = 960) -> None:
+        # 游戏界面的文字都是正向的，不需要方向分类
+        self.use_angle_cls = use_angle_cls
+        self.enable_mkldnn = enable_mkldnn
+        # 每个 OCR 实例使用的线程数，多开时需要按 CPU 核数分配
+        self.cpu_threads = cpu_threads
+        self.rec_batch_num = rec_batch_num
+        # 检测前将长边缩放到不超过该值
+        self.det_limit_side_len = det_limit_side_len
+
+    @classmethod
+    def from_section(cls, section: t.Mapping[str, str], base: t.Optional['OCRProfile'] = None) -> 'OCRProfile':
+        values = (base or cls()).as_dict()
+        for name, parse in cls.FIELDS.items():
+            if name in section:
+                values[name] = parse(section[name])
+        return cls(**values)
+
+    @classmethod
+    def load(cls) -> 'OCRProfile':
+        config = configparser.ConfigParser()
+        config.read(os.path.join(os.getcwd(), "ocr.ini"))
+        profile = cls.from_section(config["Profile"]) if config.has_section("Profile") else cls()
+
+        tuned = configparser.ConfigParser()
+        tuned.read(TUNED_PROFILE_PATH)
+        if tuned.has_section("Profile"):
+            profile = cls.from_section(tuned["Profile"], profile)
+        return profile
+
+    def save(self, path: str = TUNED_PROFILE_PATH) -> None:
+        config = configparser.ConfigParser()
+        config["Profile"] = {name: str(value).lower() for name, value in self.as_dict().items()}
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            config.write(f)
+
+    def replace(self, **changes: t.Any) -> 'OCRProfile':
+        values = self.as_dict()
+        values.update(changes)
+        return OCRProfile(**values)
+
+    def as_dict(self) -> t.Dict[str, t.Any]:
+        return {name: getattr(self, name) for name in self.FIELDS}
+
+    def __repr__(self) -> str:
+        return f"OCRProfile({', '.join(f'{name}={value}' for name, value in self.as_dict().items())})"
@@ -1,13 +1,15 @@
-from game.helper import ResonanceHelper, ExchangeHelper, OrderHelper, ExpulsionHelper
+from game.helper import ExchangeHelper, OrderHelper, ExpulsionHelper
 from web.browser import Browser
 import tkinter as tk
 from tkinter import ttk
 import threading
 import sys
 import typing as t
-from game.rail import Site, RailController
+from game.rail import Site
 from game.goods import GOODS_MAPPING, ALL_GOODS
-from game.executor import Executor
+from game.fleet import Fleet
+from ocr import ocr
+from ocr.metrics import OCRMetrics
 from . import statics
 import os
 from PIL import Image
@@ -117,23 +119,18 @@ class Application:
         self.log.pack()
 
         # 子线程相关
-        self.helper_event = threading.Event()
         self.browser_event = threading.Event()
 
-        self.helper_thread: t.Optional[threading.Thread] = None
         self.browser_thread: t.Optional[threading.Thread] = None
         self.tray_thread: t.Optional[threading.Thread] = None
 
-        # 助手初始化
-        self.helper: t.Optional[ResonanceHelper] = None
+        # 设备初始化，adb.ini 中配置了多台设备时每台设备各自运行助手
+        # 每台设备有自己的执行器和行驶控制器，所有设备停止后调用 stop_callback
+        self.fleet = Fleet.from_config(self.stop_callback)
 
-        # 执行器初始化
-        self.executor = Executor()
-        self.executor.set_callback(self.stop_callback)
-        self.executor.set_event(self.helper_event)
-
-        # 行驶控制器初始化
-        self.rail_controller = RailController(self.executor)
+        # 显示各设备的运行状态和 OCR 统计
+        self.status_button = ttk.Button(self.start_end_frame, text="运行状态", command=self.show_status, width=statics.GET_INFO_BUTTON_WIDTH)
+        self.status_button.pack(side=tk.RIGHT, padx=10)
 
         # 浏览器初始化
         self.browser = Browser(self.browser_event, self.browser_callback)
@@ -163,9 +160,7 @@ class Application:
 
 
     def test(self):
-        self.helper = OrderHelper(self.executor, self.rail_controller, self.helper_event)
-        self.helper_thread = threading.Thread(target=self.helper.run)
-        self.helper_thread.start()
+        self.fleet.start(OrderHelper)
 
 
     def create_src_and_dst(self, frame):
@@ -471,7 +466,6 @@ class Application:
             return
         
         self.start_button.config(state=tk.DISABLED)
-        self.helper_event.clear()
         src_info = (
             self.src.get(), 
             self.src_goods, 
@@ -486,18 +480,13 @@ class Application:
             self.dst_exchange_price_buy_num.get(),
             self.dst_exchange_price_sell_num.get()
         )
-        self.helper = ExchangeHelper(self.executor, self.rail_controller, self.helper_event)
-        self.helper_thread = threading.Thread(
-            target=self.helper.run, 
-            args=(((src_info, dst_info,), ))
-        )
-        self.helper_thread.start()
+        self.fleet.start(ExchangeHelper, (src_info, dst_info))
         self.stop_button.config(state=tk.NORMAL)
         
 
     def stop(self):
         self.stop_button.config(state=tk.DISABLED)
-        self.helper_event.set()
+        self.fleet.stop()
         # 此处不能直接调用join，否则会阻塞主线程
         print("正在停止...")
         
@@ -506,7 +495,11 @@ class Application:
         self.start_button.config(state=tk.NORMAL)
         self.stop_button.config(state=tk.DISABLED)
         print("已停止")
-        self.helper_thread = None
+
+    def show_status(self):
+        print(self.fleet.report())
+        if isinstance(ocr, OCRMetrics):
+            print(ocr.report())
 
 
     def start_browser(self):
@@ -557,10 +550,10 @@ class Application:
 
     def clean_up(self):
         # 关闭helper线程
-        if self.helper_thread is not None:
+        if self.fleet.running:
             print("helper线程正在关闭...")
             self.stop()
-            self.helper_thread.join()    
+            self.fleet.join()
 
             print("helper线程已关闭")
         
@@ -576,7 +569,7 @@ class Application:
         
         # 关闭adb-server
         print("正在关闭adb-server...")
-        self.helper.executor.stop_client()
+        self.fleet.close()
         print("adb-server已关闭")
 
     def quit(self):